@@ -1,13 +1,29 @@
-from flask import Flask, render_template, request, jsonify
-from database import BingoDatabase
-import ast
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from werkzeug.utils import secure_filename
+from database import BingoDatabase, formatar_cartela
+from motor_bingo import avaliar_com_motor, mascara_numeros
+from sessao_rodada import GerenciadorSessoes
+from diario_rodadas import DiarioRodadas
+from padroes import PADROES
+from replay_rodada import replay_rodada
 import atexit
+import csv
+import io
+import itertools
+import json
+import queue
+import threading
 
 app = Flask(__name__)
 db = BingoDatabase()
+diario = DiarioRodadas(db)
+sessoes = GerenciadorSessoes(diario)
+# Serializa a verificação de rodada em andamento e a criação da sessão
+lock_inicio_rodada = threading.Lock()
 
 @atexit.register
 def shutdown():
+    diario.fechar()
     db.fechar_conexoes()
 
 @app.route('/')
@@ -17,33 +33,86 @@ def index():
 
 @app.route('/get_eventos', methods=['GET'])
 def get_eventos():
+    if request.args.get('detalhes'):
+        return jsonify(db.obter_metadados_eventos())
     eventos = db.obter_eventos()
     return jsonify(eventos)
 
+@app.route('/get_padroes', methods=['GET'])
+def get_padroes():
+    return jsonify(list(PADROES))
+
+@app.route('/armar_evento', methods=['POST'])
+def armar_evento():
+    try:
+        evento = request.form['evento']
+        total = db.armar_evento(evento)
+        return jsonify({'status': 'success', 'evento': evento, 'total_cartelas': total})
+
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/desarmar_evento', methods=['POST'])
+def desarmar_evento():
+    try:
+        evento = request.form['evento']
+        return jsonify({'status': 'success', 'desarmado': db.desarmar_evento(evento)})
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/iniciar_rodada', methods=['POST'])
 def iniciar_rodada():
     try:
         evento = request.form['evento']
         rodada = int(request.form['rodada'])
+        padroes = [p.strip() for p in request.form.get('padroes', '').split(',') if p.strip()]
+
+        with lock_inicio_rodada:
+            # Uma rodada já em andamento deve ser retomada (ou finalizada), não aberta de novo;
+            # sem descarregar o diário a verificação olharia dados desatualizados
+            if not diario.descarregar():
+                return jsonify({'status': 'error',
+                                'message': 'Diário de rodadas indisponível, tente novamente'}), 503
+            em_andamento = db.obter_rodada_em_andamento(evento, rodada)
+            if em_andamento is not None:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'A rodada {rodada} do evento {evento} já está em andamento',
+                    'id_rodada': em_andamento
+                }), 409
+
+            # As cartelas vêm do snapshot do evento armado ou são compiladas conforme
+            # saem do cursor; a lista só é montada quando o cliente pede as cartelas
+            cartelas = db.cartelas_para_rodada(evento, rodada)
+            primeira = next(cartelas, None)
+            if primeira is None:
+                # Todas as cartelas da rodada já foram fechadas por fechar_rodada
+                return jsonify({
+                    'status': 'error',
+                    'message': f'A rodada {rodada} do evento {evento} já foi finalizada'
+                }), 409
+            cartelas = itertools.chain((primeira,), cartelas)
+            incluir_cartelas = request.form.get('incluir_cartelas')
+            if incluir_cartelas:
+                cartelas = list(cartelas)
+
+            sessao = sessoes.criar(evento, rodada, cartelas, padroes)
+
+        resposta = {
+            'status': 'success',
+            'id_rodada': sessao.id_rodada,
+            'total_cartelas': sessao.total_cartelas
+        }
+        if incluir_cartelas:
+            resposta['cartelas'] = cartelas
+
+        return jsonify(resposta)
         
-        cartelas = db.obter_cartelas_nao_utilizadas(rodada)
-        
-        cartelas_formatadas = []
-        for cartela in cartelas:
-            try:
-                numeros = ast.literal_eval(cartela['numeros'])
-                cartelas_formatadas.append({
-                    'id': cartela['id'],
-                    'folha': cartela['folha'],
-                    'posicao': cartela['posicao_na_folha'],
-                    'numeros': numeros
-                })
-            except Exception as e:
-                print(f"Erro na cartela {cartela['id']}: {str(e)}")
-                continue
-
-        return jsonify({'status': 'success', 'cartelas': cartelas_formatadas})
-        
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -57,59 +126,241 @@ def verificar_vencedor():
         numeros_sorteados = dados['numeros_sorteados']
         cartelas = dados['cartelas']
         
-        resultados = {
-            'quatro_cantos': [],
-            'linhas': [],
-            'colunas': [],
-            'diagonais': [],
-            'cartela_cheia': [],
-            'status': {'quentes': 0, 'mornas': 0}
-        }
+        motor = dados.get('motor', 'auto')
 
-        for cartela in cartelas:
-            numeros = cartela['numeros']
-            folha = cartela['folha']
-            
-            # Verificar 4 cantos
-            cantos = [
-                numeros[0][0], numeros[0][4],
-                numeros[4][0], numeros[4][4]
-                ]
-            if all(str(c) in map(str, numeros_sorteados) or c == "FREE" for c in cantos):
-                resultados['quatro_cantos'].append(folha)
-            
-            # Verificar linhas, colunas e diagonais
-            for i in range(5):
-                linha = numeros[i]
-                if all(str(n) in map(str, numeros_sorteados) or n == "FREE" for n in linha):
-                    resultados['linhas'].append({'folha': folha, 'posicao': f'Linha {i+1}'})
-                
-                coluna = [numeros[j][i] for j in range(5)]
-                if all(str(n) in map(str, numeros_sorteados) or n == "FREE" for n in coluna):
-                    resultados['colunas'].append({'folha': folha, 'posicao': f'Coluna {chr(65+i)}'})
-            
-            diagonal1 = [numeros[i][i] for i in range(5)]
-            diagonal2 = [numeros[i][4-i] for i in range(5)]
-            if all(str(n) in map(str, numeros_sorteados) or n == "FREE" for n in diagonal1):
-                resultados['diagonais'].append({'folha': folha, 'posicao': 'Diagonal Principal'})
-            if all(str(n) in map(str, numeros_sorteados) or n == "FREE" for n in diagonal2):
-                resultados['diagonais'].append({'folha': folha, 'posicao': 'Diagonal Secundária'})
-
-            # Verificar cartela cheia
-            numeros_validos = [num for linha in numeros for num in linha if num != "FREE"]
-            numeros_faltando = sum(1 for num in numeros_validos if str(num) not in map(str, numeros_sorteados))
-            
-            if numeros_faltando == 0:
-                resultados['cartela_cheia'].append(folha)
-            elif numeros_faltando == 1:
-                resultados['status']['quentes'] += 1
-            elif numeros_faltando == 2:
-                resultados['status']['mornas'] += 1
+        resultados = avaliar_com_motor(cartelas, mascara_numeros(numeros_sorteados), motor)
 
         return jsonify(resultados)
         
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+def obter_ou_restaurar_sessao(id_rodada):
+    """Sessão da rodada, reconstruída do diário se foi perdida (reinício do servidor).
+
+    Retorna (sessao, None) ou (None, resposta de erro).
+    """
+    sessao = sessoes.obter(id_rodada)
+    if sessao is not None:
+        return sessao, None
+
+    if not diario.descarregar():
+        return None, (jsonify({'status': 'error',
+                               'message': 'Diário de rodadas indisponível, tente novamente'}), 503)
+    registro = db.obter_rodada_diario(id_rodada)
+    if registro is None:
+        return None, (jsonify({'status': 'error', 'message': 'Rodada não encontrada'}), 404)
+    if registro['finalizada_em']:
+        return None, (jsonify({'status': 'error', 'message': 'Rodada já finalizada'}), 409)
+
+    cartelas = db.cartelas_para_rodada(registro['evento'], registro['rodada'])
+    sessao = sessoes.restaurar(id_rodada, registro['evento'], registro['rodada'],
+                               cartelas, registro['padroes'], registro['numeros_sorteados'])
+    return sessao, None
+
+@app.route('/sortear_numero', methods=['POST'])
+def sortear_numero():
+    try:
+        if not request.is_json:
+            return jsonify({'error': 'Request deve ser JSON'}), 415
+
+        dados = request.get_json()
+        sessao, erro = obter_ou_restaurar_sessao(dados['id_rodada'])
+        if erro:
+            return erro
+
+        resultados = sessao.registrar_numero(dados['numero'], dados.get('modo', 'completo'))
+        return jsonify(resultados)
+
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/finalizar_rodada', methods=['POST'])
+def finalizar_rodada():
+    try:
+        id_rodada = request.form['id_rodada']
+        sessao = sessoes.remover(id_rodada)
+        if sessao is not None:
+            evento, rodada = sessao.evento, sessao.rodada
+        else:
+            # Sessão perdida em um reinício: o diário ainda sabe a qual rodada pertence
+            diario.descarregar()
+            registro = db.obter_rodada_diario(id_rodada)
+            if registro is None:
+                return jsonify({'status': 'error', 'message': 'Rodada não encontrada'}), 404
+            evento, rodada = registro['evento'], registro['rodada']
+            if not registro['finalizada_em']:
+                diario.finalizar_rodada(id_rodada)
+
+        utilizadas = db.fechar_rodada(evento, rodada, id_rodada)
+        return jsonify({'status': 'success', 'cartelas_utilizadas': utilizadas})
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/retomar_rodada', methods=['POST'])
+def retomar_rodada():
+    try:
+        sessao, erro = obter_ou_restaurar_sessao(request.form['id_rodada'])
+        if erro:
+            return erro
+
+        with sessao.lock:
+            resultados = sessao.avaliador.resultados_novos(sessao.avaliador.completos)
+            numeros_sorteados = list(sessao.numeros_sorteados)
+
+        return jsonify({
+            'status': 'success',
+            'id_rodada': sessao.id_rodada,
+            'evento': sessao.evento,
+            'rodada': sessao.rodada,
+            'padroes': sessao.padroes,
+            'total_cartelas': sessao.total_cartelas,
+            'numeros_sorteados': numeros_sorteados,
+            'resultados': resultados
+        })
+
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/replay_rodada', methods=['POST'])
+def replay():
+    try:
+        if not request.is_json:
+            return jsonify({'error': 'Request deve ser JSON'}), 415
+
+        dados = request.get_json()
+        registros = replay_rodada(dados['evento'], int(dados['rodada']),
+                                  dados['numeros_sorteados'], dados.get('padroes', []), db)
+        return jsonify({'status': 'success', 'vencedores': registros})
+
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/conferir_cartela', methods=['POST'])
+def conferir_cartela():
+    try:
+        if not request.is_json:
+            return jsonify({'error': 'Request deve ser JSON'}), 415
+
+        dados = request.get_json()
+        numeros_sorteados = [int(n) for n in dados['numeros_sorteados']]
+        mascara_numeros(numeros_sorteados)  # valida o intervalo 1-75
+        faltando = db.obter_numeros_faltando(dados['id_cartela'], numeros_sorteados)
+        if faltando is None:
+            return jsonify({'status': 'error', 'message': 'Cartela não encontrada'}), 404
+        return jsonify({'status': 'success', 'faltando': faltando})
+
+    except (KeyError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/cartelas_com_numero', methods=['GET'])
+def cartelas_com_numero():
+    try:
+        evento = request.args['evento']
+        rodada = int(request.args['rodada'])
+        numero = int(request.args['numero'])
+        if not 1 <= numero <= 75:
+            raise ValueError(f"Número inválido: {numero}")
+
+        ids = db.obter_cartelas_com_numero(evento, rodada, numero)
+        return jsonify({'status': 'success', 'numero': numero, 'cartelas': ids})
+
+    except (KeyError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+# Campos das cartelas exportadas, os mesmos em JSON e em CSV
+CAMPOS_EXPORTACAO = ('id', 'folha', 'posicao', 'rodada', 'premio', 'utilizada', 'numeros')
+
+def registros_exportacao(linhas):
+    """Cartelas no formato de exportação, pulando as inválidas"""
+    for linha in linhas:
+        try:
+            cartela = formatar_cartela(linha)
+        except Exception as e:
+            print(f"Erro na cartela {linha['id']}: {str(e)}")
+            continue
+        cartela.update(rodada=linha['rodada'], premio=linha['premio'],
+                       utilizada=linha['utilizada'])
+        yield cartela
+
+@app.route('/exportar_cartelas', methods=['GET'])
+def exportar_cartelas():
+    """Exporta as cartelas do evento (ou de uma rodada) em JSON ou CSV, em fluxo"""
+    evento = request.args.get('evento')
+    if not evento:
+        return jsonify({'status': 'error', 'message': 'Informe o evento'}), 400
+    rodada = request.args.get('rodada', type=int)
+    formato = request.args.get('formato', 'json')
+    if formato not in ('json', 'csv'):
+        return jsonify({'status': 'error', 'message': f'Formato inválido: {formato}'}), 400
+
+    # Conexão própria: um download lento não pode prender uma conexão do pool
+    linhas = db.iterar_cartelas(evento, rodada, dedicada=True)
+
+    def gerar_json():
+        yield '['
+        for i, cartela in enumerate(registros_exportacao(linhas)):
+            yield (',' if i else '') + json.dumps({campo: cartela[campo] for campo in CAMPOS_EXPORTACAO},
+                                                  ensure_ascii=False)
+        yield ']'
+
+    def gerar_csv():
+        # csv.writer faz o escape de ';', aspas e quebras de linha em premio e id
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, delimiter=';', lineterminator='\n')
+        escritor.writerow(CAMPOS_EXPORTACAO)
+        for cartela in registros_exportacao(linhas):
+            cartela['numeros'] = ','.join(str(n) for valores in cartela['numeros'] for n in valores)
+            escritor.writerow([cartela[campo] for campo in CAMPOS_EXPORTACAO])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if formato == 'csv':
+        nome_arquivo = secure_filename(f'cartelas_{evento}.csv')
+        return Response(stream_with_context(gerar_csv()), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename="{nome_arquivo}"'})
+    return Response(stream_with_context(gerar_json()), mimetype='application/json')
+
+@app.route('/acompanhar_rodada/<id_rodada>', methods=['GET'])
+def acompanhar_rodada(id_rodada):
+    sessao, erro = obter_ou_restaurar_sessao(id_rodada)
+    if erro:
+        return erro
+
+    fila = sessao.assinar()
+
+    def gerar():
+        try:
+            while True:
+                try:
+                    mensagem = fila.get(timeout=15)
+                except queue.Empty:
+                    # Comentário SSE para manter a conexão aberta
+                    yield ": ping\n\n"
+                    continue
+                if mensagem is None:
+                    break
+                yield mensagem
+        finally:
+            sessao.cancelar_assinatura(fila)
+
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
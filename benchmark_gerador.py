@@ -0,0 +1,79 @@
+"""Benchmark da geração de cartelas únicas.
+
+Mede o tempo de ``gerar_cartelas_unicas`` (deduplicação por set) para
+eventos de tamanhos crescentes e mostra o custo por cartela, que deve ficar
+constante, ou seja, escala linear. Com NumPy também mede a geração
+vetorizada em lotes, a geração por ranks distintos (sem impressões digitais)
+e, para tamanhos pequenos, a deduplicação antiga, por busca em lista, que
+cresce de forma quadrática.
+
+Uso: python benchmark_gerador.py [-t 10000 100000 500000] [--limite-lista 10000]
+"""
+import time
+from typing import List
+
+from geracao_cartelas import (gerar_cartela, gerar_cartelas_unicas, gerar_cartelas_unicas_lote,
+                              gerar_cartelas_por_rank)
+from motor_numpy import NUMPY_DISPONIVEL
+
+TAMANHOS_PADRAO = [1000, 5000, 10000, 50000, 100000, 250000, 500000]
+
+# Maior tamanho medido com a deduplicação por lista
+LIMITE_LISTA = 10000
+
+
+def gerar_com_lista(quantidade: int) -> List:
+    """Deduplicação original de gerar_todas_cartelas, O(n²)."""
+    cartelas = []
+    while len(cartelas) < quantidade:
+        nova_cartela = gerar_cartela()
+        if nova_cartela not in cartelas:
+            cartelas.append(nova_cartela)
+    return cartelas
+
+
+def cronometrar(funcao) -> float:
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def executar(tamanhos: List[int], limite_lista: int):
+    print(f"{'cartelas':>9} | {'set (s)':>9} | {'us/cartela':>10} | {'cartelas/s':>11} | "
+          f"{'lote (s)':>9} | {'rank (s)':>9} | {'lista (s)':>9}")
+    custos = []
+
+    for tamanho in tamanhos:
+        t_set = cronometrar(lambda: gerar_cartelas_unicas(tamanho, intervalo_progresso=0))
+        custo = t_set / tamanho * 1e6
+        custos.append(custo)
+
+        t_lote = ''
+        if NUMPY_DISPONIVEL:
+            t_lote = f"{cronometrar(lambda: gerar_cartelas_unicas_lote(tamanho, intervalo_progresso=0)):.2f}"
+
+        t_rank = cronometrar(lambda: gerar_cartelas_por_rank(tamanho))
+
+        t_lista = ''
+        if tamanho <= limite_lista:
+            t_lista = f"{cronometrar(lambda: gerar_com_lista(tamanho)):.2f}"
+
+        print(f"{tamanho:>9} | {t_set:>9.2f} | {custo:>10.2f} | {tamanho / t_set:>11,.0f} | "
+              f"{t_lote:>9} | {t_rank:>9.2f} | {t_lista:>9}")
+
+    if len(custos) > 1:
+        print(f"Custo por cartela do maior tamanho / menor: {custos[-1] / custos[0]:.2f}x "
+              f"(1x = escala linear)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark da geração de cartelas únicas')
+    parser.add_argument('-t', '--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help='Quantidades de cartelas a gerar')
+    parser.add_argument('--limite-lista', type=int, default=LIMITE_LISTA,
+                        help='Maior tamanho medido também com a deduplicação por lista')
+
+    args = parser.parse_args()
+    executar(args.tamanhos, args.limite_lista)
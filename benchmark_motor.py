@@ -0,0 +1,104 @@
+"""Benchmark dos motores de verificação de vencedores.
+
+Compara o motor de máscaras de bits (Python puro) com o motor vetorizado em
+NumPy para rodadas de tamanhos crescentes e indica o ponto de cruzamento,
+usado como ``LIMIAR_NUMPY`` em motor_numpy.py.
+
+Uso: python benchmark_motor.py [-s 45] [-r 5] [-t 100 1000 10000]
+"""
+import random
+import time
+from typing import List, Dict, Any
+
+from motor_bingo import compilar_cartelas, avaliar_cartelas, mascara_numeros
+from motor_numpy import NUMPY_DISPONIVEL, MatrizCartelas
+
+TAMANHOS_PADRAO = [10, 25, 50, 100, 250, 500, 1000, 5000, 10000, 50000]
+
+
+def gerar_cartelas(quantidade: int) -> List[Dict[str, Any]]:
+    """Gera cartelas aleatórias no formato de /iniciar_rodada."""
+    cartelas = []
+    for i in range(quantidade):
+        colunas = []
+        for col in range(5):
+            numeros = random.sample(range(1 + col*15, 16 + col*15), 5)
+            if col == 2:
+                numeros[2] = "FREE"
+            colunas.append(numeros)
+        cartelas.append({
+            'id': str(i),
+            'folha': i // 5 + 1,
+            'posicao': i % 5 + 1,
+            'numeros': [list(linha) for linha in zip(*colunas)]
+        })
+    return cartelas
+
+
+def cronometrar(funcao, repeticoes: int) -> float:
+    """Menor tempo (em ms) entre ``repeticoes`` execuções."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def executar(tamanhos: List[int], sorteados: int, repeticoes: int):
+    if not NUMPY_DISPONIVEL:
+        print("NumPy não está instalado; nada a comparar.")
+        return
+
+    numeros = random.sample(range(1, 76), sorteados)
+    mascara = mascara_numeros(numeros)
+    cruzamento_total = None
+    cruzamento_avaliacao = None
+
+    print(f"{sorteados} números sorteados, melhor de {repeticoes} execuções (ms)")
+    print(f"{'cartelas':>9} | {'bits':>9} | {'numpy':>9} | {'bits+comp':>9} | {'numpy+comp':>10}")
+
+    for tamanho in tamanhos:
+        cartelas = gerar_cartelas(tamanho)
+        compiladas = compilar_cartelas(cartelas)
+        matriz = MatrizCartelas(cartelas)
+
+        # Apenas a avaliação, com as estruturas já montadas (sessões de rodada)
+        t_bits = cronometrar(lambda: avaliar_cartelas(compiladas, mascara), repeticoes)
+        t_numpy = cronometrar(lambda: matriz.avaliar(mascara), repeticoes)
+
+        # Compilação + avaliação, como em /verificar_vencedor
+        t_bits_total = cronometrar(
+            lambda: avaliar_cartelas(compilar_cartelas(cartelas), mascara), repeticoes)
+        t_numpy_total = cronometrar(
+            lambda: MatrizCartelas(cartelas).avaliar(mascara), repeticoes)
+
+        print(f"{tamanho:>9} | {t_bits:>9.2f} | {t_numpy:>9.2f} | "
+              f"{t_bits_total:>9.2f} | {t_numpy_total:>10.2f}")
+
+        if cruzamento_total is None and t_numpy_total < t_bits_total:
+            cruzamento_total = tamanho
+        if cruzamento_avaliacao is None and t_numpy < t_bits:
+            cruzamento_avaliacao = tamanho
+
+    for descricao, cruzamento in (("compilação + avaliação", cruzamento_total),
+                                  ("apenas avaliação", cruzamento_avaliacao)):
+        if cruzamento is None:
+            print(f"Ponto de cruzamento ({descricao}): NumPy não superou o motor de bits")
+        else:
+            print(f"Ponto de cruzamento ({descricao}): ~{cruzamento} cartelas")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark dos motores de verificação')
+    parser.add_argument('-s', '--sorteados', type=int, default=45,
+                        help='Quantidade de números sorteados (1-75)')
+    parser.add_argument('-r', '--repeticoes', type=int, default=5,
+                        help='Execuções por medição')
+    parser.add_argument('-t', '--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help='Quantidades de cartelas a testar')
+
+    args = parser.parse_args()
+    executar(args.tamanhos, args.sorteados, args.repeticoes)
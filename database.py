@@ -1,12 +1,226 @@
 import sqlite3
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Iterable, Iterator, Set
+from contextlib import contextmanager
 import threading
+import queue
+import time
+import ast
+
+
+def codificar_numeros(numeros: List[Tuple]) -> bytes:
+    """Codifica uma cartela 5x5 em um BLOB de 25 bytes (linha a linha, FREE = 0)"""
+    celulas = [0 if n == "FREE" else int(n) for linha in numeros for n in linha]
+    if len(celulas) != 25 or not all(0 <= n <= 75 for n in celulas):
+        raise ValueError(f"Cartela inválida: {numeros}")
+    return bytes(celulas)
+
+
+# O rank de uma cartela (geracao_cartelas.rank_cartela) tem 89 bits, mais que o
+# INTEGER do SQLite; é gravado como BLOB big-endian de largura fixa
+BYTES_RANK = 12
+
+
+def codificar_rank(rank: Optional[int]) -> Optional[bytes]:
+    """Codifica o rank de uma cartela em um BLOB de BYTES_RANK bytes (None se não houver)"""
+    if rank is None:
+        return None
+    return rank.to_bytes(BYTES_RANK, 'big')
+
+
+def decodificar_rank(rank: Optional[bytes]) -> Optional[int]:
+    if rank is None:
+        return None
+    return int.from_bytes(rank, 'big')
+
+
+def decodificar_numeros(numeros) -> List[Tuple]:
+    """Decodifica a coluna numeros, aceitando o BLOB novo e o texto antigo"""
+    if isinstance(numeros, str):
+        cartela = ast.literal_eval(numeros)
+        codificar_numeros(cartela)  # texto antigo pode estar malformado
+        return cartela
+    return [tuple(n if n else "FREE" for n in numeros[i:i + 5]) for i in range(0, 25, 5)]
+
+
+def celulas_cartela(numeros: List[Tuple]):
+    """Gera (numero, linha, coluna) de cada célula numerada, ignorando FREE"""
+    for linha, valores in enumerate(numeros):
+        for coluna, numero in enumerate(valores):
+            if numero != "FREE":
+                yield int(numero), linha, coluna
+
+
+def formatar_cartela(cartela: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte uma linha da tabela cartelas no formato usado pelas rodadas."""
+    return {
+        'id': cartela['id'],
+        'folha': cartela['folha'],
+        'posicao': cartela['posicao_na_folha'],
+        'numeros': decodificar_numeros(cartela['numeros'])
+    }
+
+
+def formatar_cartelas(linhas: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Formata as linhas conforme chegam do banco, pulando as inválidas."""
+    for cartela in linhas:
+        try:
+            yield formatar_cartela(cartela)
+        except Exception as e:
+            print(f"Erro na cartela {cartela['id']}: {str(e)}")
+            continue
+
+
+class SnapshotEvento:
+    """Cópia em memória, somente leitura, das cartelas de um evento armado.
+
+    As cartelas ficam já decodificadas, agrupadas por rodada (apenas as não
+    utilizadas, na ordem de folha/posição) e indexadas por id, de modo que
+    iniciar uma rodada ou conferir uma cartela não acessa o disco.
+    """
+
+    def __init__(self, evento: str, linhas: Iterable[Dict[str, Any]]):
+        self.evento = evento
+        self.rodadas: Dict[int, List[Dict[str, Any]]] = {}
+        self.cartelas: Dict[str, Dict[str, Any]] = {}
+        for linha in linhas:
+            try:
+                cartela = formatar_cartela(linha)
+            except Exception as e:
+                print(f"Erro na cartela {linha['id']}: {str(e)}")
+                continue
+            self.cartelas[cartela['id']] = cartela
+            if not linha['utilizada']:
+                self.rodadas.setdefault(linha['rodada'], []).append(cartela)
+
+    def numeros_faltando(self, id_cartela: str,
+                         numeros_sorteados: List[int]) -> List[Dict[str, int]]:
+        sorteados = set(numeros_sorteados)
+        return [{'numero': numero, 'linha': linha, 'coluna': coluna}
+                for numero, linha, coluna in celulas_cartela(self.cartelas[id_cartela]['numeros'])
+                if numero not in sorteados]
+
+
+class PoolConexoes:
+    """Pool de conexões SQLite em modo WAL.
+
+    As conexões são criadas sob demanda até ``tamanho`` e emprestadas a uma
+    thread por vez. Com WAL, leitores nunca esperam por um escritor (por
+    exemplo, o gerador gravando um evento novo enquanto rodadas são servidas).
+    """
+
+    # Pragmas aplicados a cada conexão nova
+    PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # em KiB (64 MiB)
+        'busy_timeout': 5000
+    }
+
+    def __init__(self, db_name: str, tamanho: int = 8, cache_instrucoes: int = 256,
+                 pragmas: Optional[Dict[str, Any]] = None):
+        self.db_name = db_name
+        self.tamanho = max(1, tamanho)
+        self.cache_instrucoes = cache_instrucoes
+        self.pragmas = dict(self.PRAGMAS, **(pragmas or {}))
+        self._livres = queue.LifoQueue()
+        self._todas: List[sqlite3.Connection] = []
+        self._avulsas: Set[sqlite3.Connection] = set()
+        self._lock = threading.Lock()
+        self._fechado = False
+
+    def _criar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_name, check_same_thread=False,
+                               cached_statements=self.cache_instrucoes)
+        conn.row_factory = sqlite3.Row
+        for nome, valor in self.pragmas.items():
+            conn.execute(f'PRAGMA {nome} = {valor}')
+        return conn
+
+    def nova_conexao(self) -> sqlite3.Connection:
+        """Cria uma conexão avulsa, fora do pool, a ser fechada com fechar_avulsa.
+
+        Ela não ocupa uma vaga do pool, mas é registrada para que ``fechar``
+        também a feche se ainda estiver aberta (exportação em andamento).
+        """
+        with self._lock:
+            if self._fechado:
+                raise RuntimeError("Pool de conexões fechado")
+            conn = self._criar()
+            self._avulsas.add(conn)
+        return conn
+
+    def fechar_avulsa(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._avulsas.discard(conn)
+        conn.close()
+
+    def obter(self, timeout: Optional[float] = 30) -> sqlite3.Connection:
+        """Empresta uma conexão, criando uma nova se o pool ainda não estiver cheio"""
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._fechado:
+                raise RuntimeError("Pool de conexões fechado")
+            if len(self._todas) < self.tamanho:
+                conn = self._criar()
+                self._todas.append(conn)
+                return conn
+
+        try:
+            return self._livres.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("Nenhuma conexão livre no pool") from None
+
+    def devolver(self, conn: sqlite3.Connection):
+        """Devolve uma conexão ao pool, desfazendo transações abertas"""
+        if self._fechado:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._livres.put(conn)
+
+    def fechar(self):
+        """Fecha todas as conexões criadas pelo pool, em uso ou não, e as avulsas"""
+        with self._lock:
+            self._fechado = True
+            conexoes, self._todas = self._todas + list(self._avulsas), []
+            self._avulsas = set()
+        for conn in conexoes:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._livres = queue.LifoQueue()
+
 
 class BingoDatabase:
     _instance = None
     _lock = threading.Lock()
     
-    def __new__(cls, db_name: str = "bingo_cartelas.db"):
+    # Configuração do pool de conexões
+    TAMANHO_POOL = 8
+    CACHE_INSTRUCOES = 256
+    
+    # Validade do cache de eventos; cobre gravações feitas por outros
+    # processos (o gerador), que não conseguem invalidar o cache deste
+    CACHE_EVENTOS_SEGUNDOS = 30
+
+    # Linhas lidas por fetchmany nos iteradores de cartelas
+    TAMANHO_LOTE_LEITURA = 500
+
+    # Impressões digitais por consulta na verificação de cartelas repetidas
+    LOTE_IMPRESSOES = 500
+
+    # PRAGMA user_version a partir do qual as cartelas antigas já foram convertidas
+    # para BLOB e incluídas em cartela_numeros (evita varrer a tabela a cada abertura)
+    VERSAO_CARTELAS_MIGRADAS = 1
+    
+    def __new__(cls, db_name: str = "bingo_cartelas.db", **kwargs):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
@@ -14,111 +228,657 @@ class BingoDatabase:
                     cls._instance.initialized = False
         return cls._instance
     
-    def __init__(self, db_name: str = "bingo_cartelas.db"):
+    def __init__(self, db_name: str = "bingo_cartelas.db", tamanho_pool: int = TAMANHO_POOL,
+                 cache_instrucoes: int = CACHE_INSTRUCOES, pragmas: Optional[Dict[str, Any]] = None):
         if not self.initialized:
             self.db_name = db_name
-            self.thread_local = threading.local()
+            self.pool = PoolConexoes(db_name, tamanho_pool, cache_instrucoes, pragmas)
+            self._cache_eventos: Optional[List[Dict[str, Any]]] = None
+            self._cache_eventos_em = 0.0
+            self._cache_lock = threading.Lock()
+            self._snapshots: Dict[str, SnapshotEvento] = {}
             self._criar_tabela()
             self.initialized = True
     
-    def get_connection(self):
-        """Obtém uma conexão de banco de dados thread-safe"""
-        if not hasattr(self.thread_local, "conn"):
-            self.thread_local.conn = sqlite3.connect(self.db_name)
-            self.thread_local.conn.row_factory = sqlite3.Row
-        return self.thread_local.conn
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool durante o bloco with"""
+        conn = self.pool.obter()
+        try:
+            yield conn
+        finally:
+            self.pool.devolver(conn)
     
+    @contextmanager
+    def conexao_dedicada(self):
+        """Conexão fora do pool para leituras longas (exportações em fluxo)"""
+        conn = self.pool.nova_conexao()
+        try:
+            yield conn
+        finally:
+            self.pool.fechar_avulsa(conn)
+
     def _criar_tabela(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cartelas (
-            id TEXT PRIMARY KEY,
-            evento TEXT,
-            folha INTEGER,
-            posicao_na_folha INTEGER,
-            numeros TEXT,
-            rodada INTEGER,
-            premio TEXT,
-            utilizada INTEGER DEFAULT 0
-        )
-        ''')
-        
-        cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_evento ON cartelas (evento)
-        ''')
-        
-        conn.commit()
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cartelas (
+                id TEXT PRIMARY KEY,
+                evento TEXT,
+                folha INTEGER,
+                posicao_na_folha INTEGER,
+                numeros TEXT,
+                rodada INTEGER,
+                premio TEXT,
+                utilizada INTEGER DEFAULT 0,
+                id_rodada TEXT,
+                utilizada_em TEXT,
+                rank_cartela BLOB
+            )
+            ''')
+
+            # Bancos anteriores ao fechamento de rodada (e ao rank) não têm estas colunas
+            cursor.execute('PRAGMA table_info(cartelas)')
+            colunas = {row['name'] for row in cursor.fetchall()}
+            for coluna, tipo in (('id_rodada', 'TEXT'), ('utilizada_em', 'TEXT'),
+                                 ('rank_cartela', 'BLOB')):
+                if coluna not in colunas:
+                    cursor.execute(f'ALTER TABLE cartelas ADD COLUMN {coluna} {tipo}')
+
+            # Índice de cobertura para carregar uma rodada: filtra por evento,
+            # rodada e utilizada, já na ordem de folha/posição, e inclui id e
+            # numeros para que a consulta não precise acessar a tabela.
+            # Substitui o antigo idx_evento, que é prefixo dele.
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_rodada ON cartelas
+            (evento, rodada, utilizada, folha, posicao_na_folha, id, numeros)
+            ''')
+            cursor.execute('DROP INDEX IF EXISTS idx_evento')
+
+            # A coluna numeros (BLOB de 25 bytes) é a impressão digital canônica
+            # da cartela; o índice permite verificar repetições entre todos os
+            # eventos sem varrer a tabela
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cartelas_numeros ON cartelas (numeros, evento)
+            ''')
+
+            # Números de cada cartela normalizados, para consultas como
+            # "quais cartelas desta rodada têm o 42" direto no SQL
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS cartela_numeros (
+                id_cartela TEXT NOT NULL,
+                numero INTEGER NOT NULL,
+                linha INTEGER NOT NULL,
+                coluna INTEGER NOT NULL,
+                PRIMARY KEY (id_cartela, linha, coluna)
+            ) WITHOUT ROWID
+            ''')
+
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_cartela_numeros_numero
+            ON cartela_numeros (numero, id_cartela)
+            ''')
+
+            # Metadados por evento, mantidos a cada gravação de cartelas
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS eventos (
+                nome TEXT PRIMARY KEY,
+                total_cartelas INTEGER,
+                folhas INTEGER,
+                cartelas_por_folha INTEGER,
+                rodadas INTEGER,
+                criado_em TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+
+            # Diário das rodadas: início/fim, sorteios e vencedores (só acréscimos)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rodadas (
+                id TEXT PRIMARY KEY,
+                evento TEXT,
+                rodada INTEGER,
+                padroes TEXT,
+                iniciada_em TEXT DEFAULT CURRENT_TIMESTAMP,
+                finalizada_em TEXT
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sorteios (
+                id_rodada TEXT NOT NULL,
+                ordem INTEGER NOT NULL,
+                numero INTEGER NOT NULL,
+                sorteado_em TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (id_rodada, ordem)
+            ) WITHOUT ROWID
+            ''')
+
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vencedores (
+                id_rodada TEXT NOT NULL,
+                sorteio INTEGER NOT NULL,
+                id_cartela TEXT,
+                folha INTEGER,
+                categoria TEXT,
+                posicao TEXT
+            )
+            ''')
+
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_vencedores_rodada ON vencedores (id_rodada, sorteio)
+            ''')
+
+            # Cartelas ainda em texto não casam com as impressões digitais (BLOB)
+            # usadas na verificação de unicidade entre eventos, e as gravadas antes
+            # de cartela_numeros não aparecem na conferência: converte uma única
+            # vez por banco; cartelas inválidas ficam para o migrar_banco.py
+            cursor.execute('PRAGMA user_version')
+            if cursor.fetchone()[0] < self.VERSAO_CARTELAS_MIGRADAS:
+                convertidas = self._migrar_numeros_binarios(cursor)
+                if convertidas:
+                    print(f"Cartelas convertidas para o formato binário: {convertidas}")
+                preenchidas = self._preencher_cartela_numeros(cursor)
+                if preenchidas:
+                    print(f"Cartelas incluídas em cartela_numeros: {preenchidas}")
+                cursor.execute(f'PRAGMA user_version = {self.VERSAO_CARTELAS_MIGRADAS}')
+
+            # Bancos anteriores à tabela eventos: preenche na primeira abertura
+            cursor.execute('SELECT 1 FROM eventos LIMIT 1')
+            if cursor.fetchone() is None:
+                self._preencher_eventos(cursor)
+
+            conn.commit()
 
     def limpar_cartelas_evento(self, evento: str) -> int:
         """Remove todas as cartelas de um evento específico"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            removidas = self._remover_cartelas(cursor, evento)
+            conn.commit()
+        self._descartar_snapshot(evento)
+        self.invalidar_cache_eventos()
+        return removidas
+
+    def _remover_cartelas(self, cursor: sqlite3.Cursor, evento: str) -> int:
+        cursor.execute('''
+        DELETE FROM cartela_numeros
+        WHERE id_cartela IN (SELECT id FROM cartelas WHERE evento = ?)
+        ''', (evento,))
         cursor.execute('''
         DELETE FROM cartelas WHERE evento = ?
         ''', (evento,))
-        conn.commit()
-        return cursor.rowcount
+        removidas = cursor.rowcount
+        cursor.execute('''
+        DELETE FROM eventos WHERE nome = ?
+        ''', (evento,))
+        return removidas
 
     def salvar_cartela(self, evento: str, id_cartela: str, folha: int, 
                       posicao: int, numeros: List[Tuple], rodada: int, premio: str):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        numeros_str = str(numeros)
-        
-        cursor.execute('''
+        self.salvar_cartelas(evento, [{
+            'id_cartela': id_cartela,
+            'folha': folha,
+            'posicao': posicao,
+            'numeros': numeros,
+            'rodada': rodada,
+            'premio': premio
+        }])
+
+    def _inserir_cartelas(self, cursor: sqlite3.Cursor, evento: str,
+                          cartelas: List[Dict[str, Any]]) -> int:
+        cursor.executemany('''
         INSERT INTO cartelas 
-        (id, evento, folha, posicao_na_folha, numeros, rodada, premio)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (id_cartela, evento, folha, posicao, numeros_str, rodada, premio))
-        
-        conn.commit()
+        (id, evento, folha, posicao_na_folha, numeros, rodada, premio, rank_cartela)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', ((c['id_cartela'], evento, c['folha'], c['posicao'],
+               codificar_numeros(c['numeros']), c['rodada'], c['premio'],
+               codificar_rank(c.get('rank')))
+              for c in cartelas))
+        self._inserir_numeros(cursor, ((c['id_cartela'], c['numeros']) for c in cartelas))
+        self._atualizar_evento(cursor, evento)
+        return len(cartelas)
 
-    def marcar_como_utilizada(self, id_cartela: str):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    SELECT_METADADOS_EVENTO = '''
+    SELECT evento, COUNT(*), COUNT(DISTINCT folha), MAX(posicao_na_folha), COUNT(DISTINCT rodada)
+    FROM cartelas
+    '''
+
+    def _atualizar_evento(self, cursor: sqlite3.Cursor, evento: str):
+        """Recalcula os metadados de um evento a partir das suas cartelas"""
         cursor.execute('''
-        UPDATE cartelas SET utilizada = 1 WHERE id = ?
-        ''', (id_cartela,))
-        conn.commit()
+        INSERT INTO eventos (nome, total_cartelas, folhas, cartelas_por_folha, rodadas)
+        ''' + self.SELECT_METADADOS_EVENTO + '''
+        WHERE evento = ? GROUP BY evento
+        ON CONFLICT(nome) DO UPDATE SET
+            total_cartelas = excluded.total_cartelas,
+            folhas = excluded.folhas,
+            cartelas_por_folha = excluded.cartelas_por_folha,
+            rodadas = excluded.rodadas
+        ''', (evento,))
 
-    def obter_cartela(self, id_cartela: str) -> Optional[Dict[str, Any]]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def _preencher_eventos(self, cursor: sqlite3.Cursor) -> int:
         cursor.execute('''
-        SELECT * FROM cartelas WHERE id = ?
-        ''', (id_cartela,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        INSERT INTO eventos (nome, total_cartelas, folhas, cartelas_por_folha, rodadas)
+        ''' + self.SELECT_METADADOS_EVENTO + '''
+        WHERE evento NOT IN (SELECT nome FROM eventos) GROUP BY evento
+        ''')
+        return cursor.rowcount
 
-    def obter_cartelas_nao_utilizadas(self, rodada: int = None) -> List[Dict[str, Any]]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        if rodada is not None:
+    def _inserir_numeros(self, cursor: sqlite3.Cursor, cartelas):
+        """Preenche cartela_numeros a partir de pares (id_cartela, numeros)"""
+        cursor.executemany('''
+        INSERT INTO cartela_numeros (id_cartela, numero, linha, coluna)
+        VALUES (?, ?, ?, ?)
+        ''', ((id_cartela, numero, linha, coluna)
+              for id_cartela, numeros in cartelas
+              for numero, linha, coluna in celulas_cartela(numeros)))
+
+    def salvar_cartelas(self, evento: str, cartelas: List[Dict[str, Any]]) -> int:
+        """Salva várias cartelas em uma única transação (tudo ou nada).
+
+        Cada cartela é um dicionário com os mesmos campos de salvar_cartela:
+        id_cartela, folha, posicao, numeros, rodada e premio.
+        """
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                inseridas = self._inserir_cartelas(cursor, evento, cartelas)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        self._descartar_snapshot(evento)
+        self.invalidar_cache_eventos()
+        return inseridas
+
+    def substituir_cartelas_evento(self, evento: str,
+                                   cartelas: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Troca todas as cartelas de um evento em uma única transação.
+
+        Retorna (removidas, inseridas). Se algo falhar, o evento anterior
+        permanece intacto.
+        """
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                removidas = self._remover_cartelas(cursor, evento)
+                inseridas = self._inserir_cartelas(cursor, evento, cartelas)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        self._descartar_snapshot(evento)
+        self.invalidar_cache_eventos()
+        return removidas, inseridas
+
+    def fechar_rodada(self, evento: str, rodada: int, id_rodada: Optional[str] = None) -> int:
+        """Marca todas as cartelas ainda livres de (evento, rodada) como utilizadas.
+
+        Um único UPDATE registra o id da rodada e o horário do fechamento;
+        retorna a quantidade de cartelas marcadas.
+        """
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            UPDATE cartelas
+            SET utilizada = 1, id_rodada = ?, utilizada_em = CURRENT_TIMESTAMP
+            WHERE evento = ? AND rodada = ? AND utilizada = 0
+            ''', (id_rodada, evento, rodada))
+            conn.commit()
+            utilizadas = cursor.rowcount
+
+        snapshot = self._snapshots.get(evento)
+        if snapshot is not None:
+            snapshot.rodadas.pop(rodada, None)
+        return utilizadas
+
+    def marcar_como_utilizada(self, id_cartela: str):
+        with self.conexao() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
+            UPDATE cartelas SET utilizada = 1 WHERE id = ?
+            ''', (id_cartela,))
+            conn.commit()
+
+    def obter_cartela(self, id_cartela: str) -> Optional[Dict[str, Any]]:
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT * FROM cartelas WHERE id = ?
+            ''', (id_cartela,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cartela = dict(row)
+            cartela['rank_cartela'] = decodificar_rank(cartela['rank_cartela'])
+            return cartela
+
+    def _iterar_consulta(self, consulta: str, parametros: Tuple = (),
+                         tamanho_lote: Optional[int] = None,
+                         dedicada: bool = False) -> Iterator[sqlite3.Row]:
+        """Executa uma consulta e gera as linhas lidas em lotes com fetchmany.
+
+        A conexão fica presa até o gerador terminar (ou ser fechado). Leitores
+        que dependem do ritmo de um cliente, como downloads, devem usar
+        ``dedicada=True`` para não ocupar uma conexão do pool.
+        """
+        tamanho_lote = tamanho_lote or self.TAMANHO_LOTE_LEITURA
+        with (self.conexao_dedicada() if dedicada else self.conexao()) as conn:
+            cursor = conn.cursor()
+            cursor.execute(consulta, parametros)
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    break
+                yield from linhas
+
+    def iterar_cartelas_nao_utilizadas(self, rodada: int = None) -> Iterator[sqlite3.Row]:
+        if rodada is not None:
+            return self._iterar_consulta('''
             SELECT * FROM cartelas 
             WHERE utilizada = 0 AND rodada = ?
             ORDER BY folha, posicao_na_folha
             ''', (rodada,))
-        else:
+        return self._iterar_consulta('''
+        SELECT * FROM cartelas 
+        WHERE utilizada = 0
+        ORDER BY folha, posicao_na_folha
+        ''')
+
+    def obter_cartelas_nao_utilizadas(self, rodada: int = None) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self.iterar_cartelas_nao_utilizadas(rodada)]
+
+    CONSULTA_CARTELAS_EVENTO = '''
+    SELECT id, folha, posicao_na_folha, numeros FROM cartelas
+    WHERE evento = ? AND rodada = ? AND utilizada = 0
+    ORDER BY folha, posicao_na_folha
+    '''
+
+    def obter_cartelas_evento(self, evento: str, rodada: int) -> List[Dict[str, Any]]:
+        """Retorna as cartelas não utilizadas de uma rodada do evento (via idx_rodada)"""
+        return [dict(row) for row in self.iterar_cartelas_evento(evento, rodada)]
+
+    def iterar_cartelas_evento(self, evento: str, rodada: int) -> Iterator[sqlite3.Row]:
+        """Gera as cartelas não utilizadas de uma rodada sem materializar a lista"""
+        return self._iterar_consulta(self.CONSULTA_CARTELAS_EVENTO, (evento, rodada))
+
+    def cartelas_para_rodada(self, evento: str, rodada: int) -> Iterator[Dict[str, Any]]:
+        """Cartelas livres da rodada já formatadas, do snapshot se o evento estiver armado"""
+        snapshot = self._snapshots.get(evento)
+        if snapshot is not None:
+            return iter(snapshot.rodadas.get(rodada, ()))
+        return formatar_cartelas(self.iterar_cartelas_evento(evento, rodada))
+
+    def obter_impressoes_existentes(self, impressoes: Iterable[bytes],
+                                    excluir_evento: Optional[str] = None) -> Set[bytes]:
+        """Retorna quais impressões digitais (numeros codificados) já estão no banco.
+
+        As buscas são feitas em lotes pelo idx_cartelas_numeros. Cartelas de
+        ``excluir_evento`` (o evento que está sendo regerado) não contam.
+        Cartelas ainda em texto só são encontradas depois de migrar_numeros_binarios.
+        """
+        impressoes = list(impressoes)
+        encontradas = set()
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            for inicio in range(0, len(impressoes), self.LOTE_IMPRESSOES):
+                lote = impressoes[inicio:inicio + self.LOTE_IMPRESSOES]
+                marcadores = ', '.join('?' * len(lote))
+                cursor.execute(f'''
+                SELECT DISTINCT numeros FROM cartelas
+                WHERE numeros IN ({marcadores}) AND evento IS NOT ?
+                ''', (*lote, excluir_evento))
+                encontradas.update(row['numeros'] for row in cursor.fetchall())
+        return encontradas
+
+    def contar_cartelas_repetidas(self) -> int:
+        """Quantidade de cartelas cujos números já aparecem em outra cartela do banco"""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
+            SELECT COALESCE(SUM(total - 1), 0) AS repetidas FROM (
+                SELECT COUNT(*) AS total FROM cartelas
+                GROUP BY numeros HAVING COUNT(*) > 1
+            )
+            ''')
+            return cursor.fetchone()['repetidas']
+
+    def plano_cartelas_evento(self) -> List[str]:
+        """Retorna o EXPLAIN QUERY PLAN da consulta de obter_cartelas_evento"""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('EXPLAIN QUERY PLAN ' + self.CONSULTA_CARTELAS_EVENTO, ('', 0))
+            return [row['detail'] for row in cursor.fetchall()]
+
+    def verificar_indice_rodada(self) -> bool:
+        """Confere se a carga de rodada usa só o índice de cobertura, sem ordenação extra"""
+        plano = ' '.join(self.plano_cartelas_evento())
+        return 'COVERING INDEX idx_rodada' in plano and 'TEMP B-TREE' not in plano
+
+    def obter_cartelas_rodada(self, evento: str, rodada: int) -> List[Dict[str, Any]]:
+        """Retorna todas as cartelas de uma rodada do evento, utilizadas ou não"""
+        return [dict(row) for row in self.iterar_cartelas(evento, rodada)]
+
+    def iterar_cartelas(self, evento: str, rodada: Optional[int] = None,
+                        dedicada: bool = False) -> Iterator[sqlite3.Row]:
+        """Gera as cartelas do evento (ou de uma rodada), utilizadas ou não, para exportação"""
+        if rodada is not None:
+            return self._iterar_consulta('''
             SELECT * FROM cartelas 
-            WHERE utilizada = 0
+            WHERE evento = ? AND rodada = ?
             ORDER BY folha, posicao_na_folha
-            ''')
-            
-        return [dict(row) for row in cursor.fetchall()]
+            ''', (evento, rodada), dedicada=dedicada)
+        return self._iterar_consulta('''
+        SELECT * FROM cartelas 
+        WHERE evento = ?
+        ORDER BY rodada, folha, posicao_na_folha
+        ''', (evento,), dedicada=dedicada)
+
+    def migrar_numeros_binarios(self) -> int:
+        """Converte no próprio banco as cartelas ainda gravadas como texto para BLOB"""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                convertidas = self._migrar_numeros_binarios(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return convertidas
+
+    def _migrar_numeros_binarios(self, cursor: sqlite3.Cursor) -> int:
+        cursor.execute('''
+        SELECT id, numeros FROM cartelas WHERE typeof(numeros) = 'text'
+        ''')
+        atualizacoes = []
+        for row in cursor.fetchall():
+            try:
+                atualizacoes.append((codificar_numeros(decodificar_numeros(row['numeros'])), row['id']))
+            except Exception as e:
+                print(f"Erro na cartela {row['id']}: {str(e)}")
+        cursor.executemany('''
+        UPDATE cartelas SET numeros = ? WHERE id = ?
+        ''', atualizacoes)
+        return len(atualizacoes)
+
+    def preencher_cartela_numeros(self) -> int:
+        """Preenche cartela_numeros para as cartelas gravadas antes da tabela existir"""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                preenchidas = self._preencher_cartela_numeros(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return preenchidas
+
+    def _preencher_cartela_numeros(self, cursor: sqlite3.Cursor) -> int:
+        cursor.execute('''
+        SELECT id, numeros FROM cartelas
+        WHERE id NOT IN (SELECT DISTINCT id_cartela FROM cartela_numeros)
+        ''')
+        pendentes = []
+        for row in cursor.fetchall():
+            try:
+                pendentes.append((row['id'], decodificar_numeros(row['numeros'])))
+            except Exception as e:
+                print(f"Erro na cartela {row['id']}: {str(e)}")
+        self._inserir_numeros(cursor, pendentes)
+        return len(pendentes)
+
+    def obter_cartelas_com_numero(self, evento: str, rodada: int, numero: int) -> List[str]:
+        """Retorna os ids das cartelas da rodada que contêm o número"""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT c.id FROM cartela_numeros n
+            JOIN cartelas c ON c.id = n.id_cartela
+            WHERE n.numero = ? AND c.evento = ? AND c.rodada = ?
+            ORDER BY c.folha, c.posicao_na_folha
+            ''', (numero, evento, rodada))
+            return [row['id'] for row in cursor.fetchall()]
+
+    def obter_numeros_faltando(self, id_cartela: str,
+                               numeros_sorteados: List[int]) -> Optional[List[Dict[str, int]]]:
+        """Retorna as células da cartela ainda não sorteadas (conferência de cartela).
+
+        Retorna None se a cartela não existir. Cartelas ainda sem linhas em
+        cartela_numeros são conferidas pela coluna numeros.
+        """
+        for snapshot in list(self._snapshots.values()):
+            if id_cartela in snapshot.cartelas:
+                return snapshot.numeros_faltando(id_cartela, numeros_sorteados)
+
+        sorteados = set(numeros_sorteados)
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT numero, linha, coluna FROM cartela_numeros
+            WHERE id_cartela = ?
+            ORDER BY linha, coluna
+            ''', (id_cartela,))
+            celulas = [(row['numero'], row['linha'], row['coluna']) for row in cursor.fetchall()]
+
+            if not celulas:
+                cursor.execute('SELECT numeros FROM cartelas WHERE id = ?', (id_cartela,))
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                celulas = list(celulas_cartela(decodificar_numeros(row['numeros'])))
+
+        return [{'numero': numero, 'linha': linha, 'coluna': coluna}
+                for numero, linha, coluna in celulas if numero not in sorteados]
+
+    def gravar_diario(self, rodadas: List[Tuple], sorteios: List[Tuple],
+                      vencedores: List[Tuple], finalizadas: List[Tuple]):
+        """Grava um lote do diário de rodadas em uma única transação.
+
+        rodadas: (id, evento, rodada, padroes); sorteios: (id_rodada, ordem,
+        numero); vencedores: (id_rodada, sorteio, id_cartela, folha,
+        categoria, posicao); finalizadas: (id_rodada,).
+        """
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany('''
+                INSERT OR IGNORE INTO rodadas (id, evento, rodada, padroes) VALUES (?, ?, ?, ?)
+                ''', rodadas)
+                cursor.executemany('''
+                INSERT OR IGNORE INTO sorteios (id_rodada, ordem, numero) VALUES (?, ?, ?)
+                ''', sorteios)
+                cursor.executemany('''
+                INSERT INTO vencedores (id_rodada, sorteio, id_cartela, folha, categoria, posicao)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''', vencedores)
+                cursor.executemany('''
+                UPDATE rodadas SET finalizada_em = CURRENT_TIMESTAMP WHERE id = ?
+                ''', finalizadas)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def obter_rodada_diario(self, id_rodada: str) -> Optional[Dict[str, Any]]:
+        """Retorna a rodada registrada no diário com seus números, na ordem sorteada"""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM rodadas WHERE id = ?', (id_rodada,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            rodada = dict(row)
+            rodada['padroes'] = [p for p in rodada['padroes'].split(',') if p]
+            cursor.execute('''
+            SELECT numero FROM sorteios WHERE id_rodada = ? ORDER BY ordem
+            ''', (id_rodada,))
+            rodada['numeros_sorteados'] = [r['numero'] for r in cursor.fetchall()]
+            return rodada
+
+    def obter_rodada_em_andamento(self, evento: str, rodada: int) -> Optional[str]:
+        """Retorna o id da rodada mais recente do evento que ainda não foi finalizada"""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT id FROM rodadas
+            WHERE evento = ? AND rodada = ? AND finalizada_em IS NULL
+            ORDER BY iniciada_em DESC, rowid DESC LIMIT 1
+            ''', (evento, rodada))
+            row = cursor.fetchone()
+            return row['id'] if row else None
+
+    def preencher_eventos(self) -> int:
+        """Cria na tabela eventos as entradas que faltam para eventos já gravados"""
+        with self.conexao() as conn:
+            cursor = conn.cursor()
+            preenchidos = self._preencher_eventos(cursor)
+            conn.commit()
+        self.invalidar_cache_eventos()
+        return preenchidos
+
+    def invalidar_cache_eventos(self):
+        """Descarta o cache de eventos (chamado ao gerar ou remover eventos)"""
+        with self._cache_lock:
+            self._cache_eventos = None
+
+    def obter_metadados_eventos(self) -> List[Dict[str, Any]]:
+        """Retorna os metadados de todos os eventos, servidos de um cache em memória"""
+        with self._cache_lock:
+            expirado = time.monotonic() - self._cache_eventos_em > self.CACHE_EVENTOS_SEGUNDOS
+            if self._cache_eventos is None or expirado:
+                with self.conexao() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute('SELECT * FROM eventos ORDER BY nome')
+                    self._cache_eventos = [dict(row) for row in cursor.fetchall()]
+                self._cache_eventos_em = time.monotonic()
+            return [dict(evento, armado=evento['nome'] in self._snapshots)
+                    for evento in self._cache_eventos]
 
     def obter_eventos(self) -> List[str]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT DISTINCT evento FROM cartelas')
-        return [row['evento'] for row in cursor.fetchall()]
+        return [evento['nome'] for evento in self.obter_metadados_eventos()]
+
+    def armar_evento(self, evento: str) -> int:
+        """Carrega o evento em um snapshot em memória (ou o recarrega, se já armado).
+
+        Enquanto armado, início de rodada e conferência de cartelas não vão ao
+        disco. O snapshot novo é montado por inteiro antes de substituir o
+        anterior; retorna a quantidade de cartelas carregadas.
+        """
+        snapshot = SnapshotEvento(evento, self.iterar_cartelas(evento))
+        if not snapshot.cartelas:
+            raise ValueError(f"Evento sem cartelas: {evento}")
+        self._snapshots[evento] = snapshot
+        return len(snapshot.cartelas)
+
+    def desarmar_evento(self, evento: str) -> bool:
+        """Descarta o snapshot do evento; as leituras voltam a ir ao banco"""
+        return self._snapshots.pop(evento, None) is not None
+
+    def _descartar_snapshot(self, evento: str):
+        if self.desarmar_evento(evento):
+            print(f"Cartelas do evento {evento} alteradas; snapshot em memória descartado")
 
     def fechar_conexoes(self):
         """Fecha todas as conexões abertas"""
-        if hasattr(self.thread_local, "conn"):
-            self.thread_local.conn.close()
-            del self.thread_local.conn
\ No newline at end of file
+        self.pool.fechar()
\ No newline at end of file
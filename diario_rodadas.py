@@ -0,0 +1,124 @@
+"""Diário persistente das rodadas (início, sorteios, vencedores e fim).
+
+As entradas são apenas acrescentadas e gravadas por uma thread própria em
+commits agrupados: tudo o que chegar dentro de uma janela curta vai para o
+banco em uma única transação. Com o diário, uma rodada interrompida por um
+refresh do navegador ou reinício do servidor pode ser retomada.
+"""
+import queue
+import threading
+import time
+from typing import List, Tuple, Optional
+
+from database import BingoDatabase
+
+
+class DiarioRodadas:
+    """Fila de entradas do diário gravada em lotes por uma thread de fundo."""
+
+    # Tempo (s) que o escritor espera por mais entradas antes de gravar o lote
+    JANELA_COMMIT = 0.05
+
+    # Espera (s) entre tentativas após uma falha de gravação, dobrando até o máximo
+    ESPERA_INICIAL = 0.1
+    ESPERA_MAXIMA = 5.0
+
+    # Tentativas de gravar o que estiver pendente ao fechar, antes de desistir
+    TENTATIVAS_AO_FECHAR = 5
+
+    # Prazo padrão (s) de descarregar()
+    TEMPO_DESCARREGAR = 10.0
+
+    def __init__(self, db: BingoDatabase, janela: float = JANELA_COMMIT):
+        self.db = db
+        self.janela = janela
+        self._fila: queue.Queue = queue.Queue()
+        self._escritor = threading.Thread(target=self._executar, name='diario-rodadas',
+                                          daemon=True)
+        self._escritor.start()
+
+    def iniciar_rodada(self, id_rodada: str, evento: str, rodada: int, padroes: List[str]):
+        self._fila.put(('rodada', (id_rodada, evento, rodada, ','.join(padroes))))
+
+    def registrar_sorteio(self, id_rodada: str, ordem: int, numero: int,
+                          vencedores: List[Tuple[str, int, str, Optional[str]]]):
+        """Registra um sorteio e os padrões completados por ele.
+
+        ``vencedores`` são tuplas (id_cartela, folha, categoria, posicao).
+        """
+        self._fila.put(('sorteio', (id_rodada, ordem, numero)))
+        for id_cartela, folha, categoria, posicao in vencedores:
+            self._fila.put(('vencedor', (id_rodada, ordem, id_cartela, folha, categoria, posicao)))
+
+    def finalizar_rodada(self, id_rodada: str):
+        self._fila.put(('fim', (id_rodada,)))
+
+    def descarregar(self, timeout: Optional[float] = TEMPO_DESCARREGAR) -> bool:
+        """Bloqueia até todas as entradas enfileiradas estarem gravadas.
+
+        Retorna False se o prazo acabar antes (o banco seguiu falhando).
+        """
+        evento = threading.Event()
+        self._fila.put(('descarregar', evento))
+        return evento.wait(timeout)
+
+    def fechar(self):
+        """Grava o que estiver pendente e encerra a thread do escritor."""
+        self._fila.put(('fechar', None))
+        self._escritor.join()
+
+    def _receber(self, bloquear: bool) -> list:
+        """Lê da fila tudo o que chegar dentro da janela de commit."""
+        try:
+            lote = [self._fila.get(block=bloquear)]
+        except queue.Empty:
+            return []
+        limite = time.monotonic() + self.janela
+        try:
+            while lote[-1][0] not in ('descarregar', 'fechar'):
+                lote.append(self._fila.get(timeout=max(0, limite - time.monotonic())))
+        except queue.Empty:
+            pass
+        return lote
+
+    def _executar(self):
+        entradas = {'rodada': [], 'sorteio': [], 'vencedor': [], 'fim': []}
+        avisos = []
+        fechar = False
+        falhas = 0
+        while True:
+            if not fechar:
+                # Com entradas pendentes de uma falha, não espera por novas
+                for tipo, dados in self._receber(bloquear=not any(entradas.values())):
+                    if tipo == 'descarregar':
+                        avisos.append(dados)
+                    elif tipo == 'fechar':
+                        fechar = True
+                    else:
+                        entradas[tipo].append(dados)
+
+            if any(entradas.values()):
+                try:
+                    self.db.gravar_diario(entradas['rodada'], entradas['sorteio'],
+                                          entradas['vencedor'], entradas['fim'])
+                except Exception as e:
+                    # Mantém o lote e tenta de novo (ex.: "database is locked"
+                    # enquanto o gerador grava um evento), esperando cada vez mais
+                    falhas += 1
+                    total = sum(len(v) for v in entradas.values())
+                    if fechar and falhas >= self.TENTATIVAS_AO_FECHAR:
+                        print(f"Erro ao gravar o diário de rodadas; {total} entradas perdidas: {str(e)}")
+                    else:
+                        espera = min(self.ESPERA_MAXIMA, self.ESPERA_INICIAL * 2 ** (falhas - 1))
+                        print(f"Erro ao gravar o diário de rodadas ({total} entradas pendentes, "
+                              f"nova tentativa em {espera:.1f}s): {str(e)}")
+                        time.sleep(espera)
+                        continue
+                falhas = 0
+                entradas = {tipo: [] for tipo in entradas}
+
+            for aviso in avisos:
+                aviso.set()
+            avisos = []
+            if fechar:
+                break
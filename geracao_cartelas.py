@@ -0,0 +1,339 @@
+"""Geração de cartelas de bingo únicas.
+
+Cada cartela é uma lista de 5 tuplas (linhas), com os números da coluna B em
+1-15, I em 16-30, N em 31-45 (com FREE no centro), G em 46-60 e O em 61-75,
+o mesmo formato consumido por ``desenhar_cartela`` e ``salvar_cartela``.
+
+A unicidade é controlada por uma impressão digital da cartela (os 25 bytes
+de ``codificar_numeros``) guardada em um set, então verificar uma cartela
+nova custa O(1) em vez de uma comparação com todas as já geradas.
+
+Com NumPy, ``gerar_cartelas_unicas_lote`` gera milhares de cartelas por
+chamada como um array (N, 5, 5): cada coluna é uma permutação aleatória da sua
+faixa de 15 números, da qual ficam os 5 primeiros, e o centro vira FREE.
+
+No modo com semente, a cartela ``i`` do evento ``E`` é derivada apenas de
+(semente, E, i): qualquer cartela pode ser regerada ou conferida sem ler o
+evento inteiro, e a mesma semente sempre produz o mesmo conjunto de cartelas.
+
+Cada cartela também tem um rank em [0, TOTAL_CARTELAS): por coluna, o sistema
+numérico combinatório dá o índice do conjunto de números e o código de Lehmer
+o da ordem em que aparecem, e as colunas são combinadas em base mista. Ranks
+distintos dão cartelas distintas por construção, e o rank (89 bits) serve
+como representação compacta da cartela.
+"""
+import hashlib
+import math
+import random
+import time
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from database import codificar_numeros
+from motor_numpy import NUMPY_DISPONIVEL
+
+if NUMPY_DISPONIVEL:
+    import numpy as np
+
+# Intervalo (em cartelas) entre as mensagens de progresso da geração
+INTERVALO_PROGRESSO = 50_000
+
+# Cartelas geradas por chamada no modo vetorizado
+TAMANHO_LOTE = 10_000
+
+# Números por coluna (B, I, N, G, O) e quantidade de arranjos possíveis em cada
+NUMEROS_COLUNA = (5, 5, 4, 5, 5)
+ARRANJOS_COLUNA = tuple(math.comb(15, k) * math.factorial(k) for k in NUMEROS_COLUNA)
+TOTAL_CARTELAS = math.prod(ARRANJOS_COLUNA)
+
+# Tentativas conferidas ao verificar uma cartela semeada (a tentativa só passa
+# de 0 quando a cartela derivada repete outra, o que é raríssimo)
+MAX_TENTATIVAS = 8
+
+
+def gerar_cartela(rng: random.Random = random) -> List[Tuple]:
+    """Gera uma cartela 5x5 com FREE no centro da coluna N."""
+    cartela = []
+    for i in range(5):
+        if i == 2:  # Coluna N
+            numeros = rng.sample(range(31, 46), 4)
+            numeros.insert(2, "FREE")
+        else:
+            numeros = rng.sample(range(1 + i*15, 16 + i*15), 5)
+        cartela.append(numeros)
+    return list(zip(*cartela))
+
+
+def impressao_digital(cartela: List[Tuple]) -> bytes:
+    """Chave canônica e hashável da cartela (igual à coluna numeros no banco)."""
+    return codificar_numeros(cartela)
+
+
+def gerar_cartelas_unicas(quantidade: int, gerar: Callable[[], List[Tuple]] = gerar_cartela,
+                          existentes: Optional[Set[bytes]] = None,
+                          intervalo_progresso: int = INTERVALO_PROGRESSO) -> List[List[Tuple]]:
+    """Gera ``quantidade`` cartelas distintas entre si (e de ``existentes``).
+
+    A cada ``intervalo_progresso`` cartelas imprime o progresso e a taxa de
+    geração; ``intervalo_progresso=0`` desliga as mensagens.
+    """
+    vistas = set(existentes) if existentes else set()
+    cartelas = []
+    repetidas = 0
+    inicio = time.perf_counter()
+
+    while len(cartelas) < quantidade:
+        cartela = gerar()
+        chave = impressao_digital(cartela)
+        if chave in vistas:
+            repetidas += 1
+            continue
+        vistas.add(chave)
+        cartelas.append(cartela)
+
+        if intervalo_progresso and len(cartelas) % intervalo_progresso == 0:
+            _informar_progresso(len(cartelas), quantidade, inicio)
+
+    if intervalo_progresso and quantidade % intervalo_progresso:
+        _informar_progresso(len(cartelas), quantidade, inicio)
+    if repetidas:
+        print(f"Cartelas repetidas descartadas: {repetidas}")
+    return cartelas
+
+
+def gerar_lote(quantidade: int, rng: "np.random.Generator") -> "np.ndarray":
+    """Gera ``quantidade`` cartelas em um array (N, 5, 5) uint8, com FREE = 0."""
+    faixas = np.tile(np.arange(1, 16, dtype=np.uint8), (quantidade, 5, 1))
+    colunas = rng.permuted(faixas, axis=2)[:, :, :5]
+    colunas += np.arange(0, 75, 15, dtype=np.uint8)[None, :, None]
+    cartelas = colunas.transpose(0, 2, 1).copy()
+    cartelas[:, 2, 2] = 0
+    return cartelas
+
+
+def gerar_cartelas_unicas_lote(quantidade: int, existentes: Optional[Set[bytes]] = None,
+                               semente: Optional[int] = None,
+                               tamanho_lote: int = TAMANHO_LOTE,
+                               intervalo_progresso: int = INTERVALO_PROGRESSO) -> List[List[Tuple]]:
+    """Versão vetorizada de ``gerar_cartelas_unicas`` (requer NumPy).
+
+    Os lotes são deduplicados pelas mesmas impressões digitais: os 25 bytes
+    de cada linha do array coincidem com ``codificar_numeros``.
+    """
+    rng = np.random.default_rng(semente)
+    vistas = set(existentes) if existentes else set()
+    cartelas = []
+    repetidas = 0
+    proximo_aviso = intervalo_progresso
+    inicio = time.perf_counter()
+
+    while len(cartelas) < quantidade:
+        lote = gerar_lote(min(tamanho_lote, quantidade - len(cartelas)), rng)
+        dados = lote.tobytes()
+        for i, valores in enumerate(lote.tolist()):
+            chave = dados[i * 25:(i + 1) * 25]
+            if chave in vistas:
+                repetidas += 1
+                continue
+            vistas.add(chave)
+            linhas = [tuple(linha) for linha in valores]
+            linhas[2] = (valores[2][0], valores[2][1], "FREE", valores[2][3], valores[2][4])
+            cartelas.append(linhas)
+
+        if intervalo_progresso and len(cartelas) >= proximo_aviso:
+            _informar_progresso(len(cartelas), quantidade, inicio)
+            proximo_aviso = (len(cartelas) // intervalo_progresso + 1) * intervalo_progresso
+
+    if intervalo_progresso and quantidade % intervalo_progresso:
+        _informar_progresso(len(cartelas), quantidade, inicio)
+    if repetidas:
+        print(f"Cartelas repetidas descartadas: {repetidas}")
+    return cartelas
+
+
+def _fluxo_semeado(semente, evento: str, indice: int, tentativa: int) -> Iterable[int]:
+    """Bytes pseudoaleatórios derivados de (semente, evento, índice, tentativa).
+
+    Usa SHAKE-256 em vez do ``random`` para que o resultado não dependa da
+    versão do Python.
+    """
+    chave = f"{semente}\x00{evento}\x00{indice}\x00{tentativa}".encode()
+    tamanho = 64
+    while True:
+        # Em caso (raro) de muitas rejeições, estende o mesmo fluxo
+        dados = hashlib.shake_256(chave).digest(tamanho)
+        yield from dados[tamanho - 64:]
+        tamanho += 64
+
+
+def cartela_semeada(semente, evento: str, indice: int, tentativa: int = 0) -> List[Tuple]:
+    """Deriva deterministicamente a cartela ``indice`` (a partir de 0) do evento."""
+    fluxo = _fluxo_semeado(semente, evento, indice, tentativa)
+    colunas = []
+    for col in range(5):
+        faixa = list(range(1 + col*15, 16 + col*15))
+        # Fisher-Yates parcial com rejeição, para escolhas sem viés
+        for j in range(5):
+            restantes = 15 - j
+            limite = 256 - 256 % restantes
+            byte = next(fluxo)
+            while byte >= limite:
+                byte = next(fluxo)
+            k = j + byte % restantes
+            faixa[j], faixa[k] = faixa[k], faixa[j]
+        colunas.append(faixa[:5])
+    colunas[2][2] = "FREE"
+    return list(zip(*colunas))
+
+
+def gerar_cartelas_semeadas(quantidade: int, semente, evento: str,
+                            proibidas: Optional[Set[bytes]] = None,
+                            intervalo_progresso: int = INTERVALO_PROGRESSO) -> List[List[Tuple]]:
+    """Gera as cartelas 0..quantidade-1 do evento a partir da semente.
+
+    Se a cartela derivada repetir uma anterior (ou uma de ``proibidas``), a
+    próxima tentativa é usada; o resultado depende só dos argumentos.
+    """
+    vistas = set(proibidas) if proibidas else set()
+    cartelas = []
+    repetidas = 0
+    inicio = time.perf_counter()
+
+    for indice in range(quantidade):
+        tentativa = 0
+        cartela = cartela_semeada(semente, evento, indice)
+        chave = impressao_digital(cartela)
+        while chave in vistas:
+            repetidas += 1
+            tentativa += 1
+            cartela = cartela_semeada(semente, evento, indice, tentativa)
+            chave = impressao_digital(cartela)
+        vistas.add(chave)
+        cartelas.append(cartela)
+
+        if intervalo_progresso and len(cartelas) % intervalo_progresso == 0:
+            _informar_progresso(len(cartelas), quantidade, inicio)
+
+    if intervalo_progresso and quantidade % intervalo_progresso:
+        _informar_progresso(len(cartelas), quantidade, inicio)
+    if repetidas:
+        print(f"Cartelas repetidas substituídas pela tentativa seguinte: {repetidas}")
+    return cartelas
+
+
+def conferir_cartela_semeada(cartela: List[Tuple], semente, evento: str, indice: int,
+                             max_tentativas: int = MAX_TENTATIVAS) -> bool:
+    """Confere se a cartela é a de número ``indice`` do evento para esta semente."""
+    chave = impressao_digital(cartela)
+    return any(impressao_digital(cartela_semeada(semente, evento, indice, t)) == chave
+               for t in range(max_tentativas))
+
+
+def _rank_coluna(valores: List[int]) -> int:
+    """Rank de uma coluna: combinação (combinadic) * k! + permutação (Lehmer)."""
+    k = len(valores)
+    ordenados = sorted(valores)
+    combinacao = sum(math.comb(v, i + 1) for i, v in enumerate(ordenados))
+    permutacao = 0
+    restantes = list(ordenados)
+    for i, v in enumerate(valores):
+        posicao = restantes.index(v)
+        permutacao += posicao * math.factorial(k - 1 - i)
+        restantes.pop(posicao)
+    return combinacao * math.factorial(k) + permutacao
+
+
+def _coluna_do_rank(rank: int, k: int) -> List[int]:
+    combinacao, permutacao = divmod(rank, math.factorial(k))
+    ordenados = []
+    v = 14
+    for i in range(k, 0, -1):
+        while math.comb(v, i) > combinacao:
+            v -= 1
+        ordenados.append(v)
+        combinacao -= math.comb(v, i)
+        v -= 1
+    ordenados.reverse()
+
+    valores = []
+    for i in range(k - 1, -1, -1):
+        posicao, permutacao = divmod(permutacao, math.factorial(i))
+        valores.append(ordenados.pop(posicao))
+    return valores
+
+
+def rank_cartela(cartela: List[Tuple]) -> int:
+    """Número em [0, TOTAL_CARTELAS) que identifica a cartela (inverso de cartela_do_rank)."""
+    rank = 0
+    for col, (k, base) in enumerate(zip(NUMEROS_COLUNA, ARRANJOS_COLUNA)):
+        valores = [int(linha[col]) - 1 - col*15 for linha in cartela if linha[col] != "FREE"]
+        if len(valores) != k or not all(0 <= v < 15 for v in valores):
+            raise ValueError(f"Cartela inválida: {cartela}")
+        rank = rank * base + _rank_coluna(valores)
+    return rank
+
+
+def cartela_do_rank(rank: int) -> List[Tuple]:
+    """Cartela correspondente a um rank em [0, TOTAL_CARTELAS)."""
+    if not 0 <= rank < TOTAL_CARTELAS:
+        raise ValueError(f"Rank fora do intervalo: {rank}")
+    colunas = []
+    for col in range(4, -1, -1):
+        rank, rank_coluna = divmod(rank, ARRANJOS_COLUNA[col])
+        colunas.append([v + 1 + col*15 for v in _coluna_do_rank(rank_coluna, NUMEROS_COLUNA[col])])
+    colunas.reverse()
+    colunas[2].insert(2, "FREE")
+    return list(zip(*colunas))
+
+
+def gerar_cartelas_por_rank(quantidade: int, existentes: Optional[Set[bytes]] = None,
+                            rng: random.Random = random) -> List[List[Tuple]]:
+    """Gera cartelas sorteando ranks distintos; não há impressões digitais a comparar.
+
+    ``existentes`` (impressões digitais de outros eventos) só é consultado
+    quando informado.
+    """
+    ranks = set()
+    cartelas = []
+    while len(cartelas) < quantidade:
+        rank = rng.randrange(TOTAL_CARTELAS)
+        if rank in ranks:
+            continue
+        ranks.add(rank)
+        cartela = cartela_do_rank(rank)
+        if existentes and impressao_digital(cartela) in existentes:
+            continue
+        cartelas.append(cartela)
+    return cartelas
+
+
+def _informar_progresso(geradas: int, total: int, inicio: float):
+    duracao = time.perf_counter() - inicio
+    taxa = geradas / duracao if duracao else float('inf')
+    print(f"  {geradas}/{total} cartelas ({taxa:,.0f} cartelas/s)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Regera ou confere uma cartela semeada')
+    parser.add_argument('semente', type=str, help='Semente usada na geração do evento')
+    parser.add_argument('evento', type=str, help='Nome do evento de bingo')
+    parser.add_argument('folha', type=int, help='Folha da cartela (a partir de 1)')
+    parser.add_argument('posicao', type=int, help='Posição da cartela na folha (a partir de 1)')
+    parser.add_argument('-c', '--cartelas_por_folha', type=int, default=5,
+                        help='Cartelas por folha usadas na geração')
+    parser.add_argument('--conferir', type=str, default=None,
+                        help='Números da cartela impressa, linha a linha, separados por vírgula (sem o FREE)')
+
+    args = parser.parse_args()
+    indice = (args.folha - 1) * args.cartelas_por_folha + (args.posicao - 1)
+
+    if args.conferir:
+        numeros = [int(n) for n in args.conferir.split(',')]
+        numeros.insert(12, "FREE")
+        impressa = [tuple(numeros[i:i + 5]) for i in range(0, 25, 5)]
+        valida = conferir_cartela_semeada(impressa, args.semente, args.evento, indice)
+        print("Cartela confere" if valida else "Cartela NÃO confere")
+    else:
+        for linha in cartela_semeada(args.semente, args.evento, indice):
+            print(" ".join(f"{n:>4}" for n in linha))
@@ -1,5 +1,4 @@
 import os
-import random
 import sqlite3
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
@@ -11,6 +10,10 @@ from reportlab.lib.colors import HexColor
 from PIL import Image
 from typing import List, Tuple, Optional
 from database import BingoDatabase
+from geracao_cartelas import (gerar_cartela, gerar_cartelas_unicas, gerar_cartelas_unicas_lote,
+                              gerar_cartelas_semeadas, gerar_cartelas_por_rank, impressao_digital,
+                              rank_cartela)
+from motor_numpy import NUMPY_DISPONIVEL
 
 class BingoGenerator:
     """Classe principal para geração e armazenamento de cartelas de bingo."""
@@ -46,14 +49,22 @@ class BingoGenerator:
     
     def __init__(self, nome_evento: str = "Evento Padrão", 
                  cartelas_por_folha: int = DEFAULT_CARTELAS_POR_FOLHA,
-                 num_folhas: int = DEFAULT_NUM_FOLHAS):
+                 num_folhas: int = DEFAULT_NUM_FOLHAS,
+                 unicidade_global: bool = True,
+                 semente: Optional[int] = None,
+                 por_rank: bool = False):
         """Inicializa o gerador de cartelas.
         
         Args:
             nome_evento: Nome do evento de bingo
             cartelas_por_folha: Quantidade de cartelas por folha (1-6)
             num_folhas: Número total de folhas a gerar
+            unicidade_global: Evita cartelas iguais às de outros eventos do banco
+            semente: Gera as cartelas de forma determinística a partir da semente
+            por_rank: Gera as cartelas sorteando ranks distintos (incompatível com semente)
         """
+        if por_rank and semente is not None:
+            raise ValueError("Geração por rank não aceita semente")
         self.cartelas: List[List[Tuple]] = []
         self.usar_fundo = False
         self.usar_imagem_free = False
@@ -62,12 +73,11 @@ class BingoGenerator:
         self.nome_evento = nome_evento
         self.cartelas_por_folha = min(max(1, cartelas_por_folha), 6)  # Limita entre 1 e 6
         self.num_folhas = max(1, num_folhas)  # Pelo menos 1 folha
+        self.unicidade_global = unicidade_global
+        self.semente = semente
+        self.por_rank = por_rank
         self.db = BingoDatabase(self.DB_NAME)
         
-        # Limpa cartelas existentes deste evento
-        removidas = self.db.limpar_cartelas_evento(self.nome_evento)
-        print(f"Removidas {removidas} cartelas existentes do evento '{self.nome_evento}'")
-        
         self._carregar_fontes()
         self._calcular_layout()
 
@@ -99,15 +109,7 @@ class BingoGenerator:
 
     def gerar_cartela_unica(self) -> List[Tuple]:
         """Gera uma cartela 5x5 única com FREE no centro da coluna N."""
-        cartela = []
-        for i in range(5):
-            if i == 2:  # Coluna N
-                numeros = random.sample(range(31, 46), 4)
-                numeros.insert(2, "FREE")
-            else:
-                numeros = random.sample(range(1 + i*15, 16 + i*15), 5)
-            cartela.append(numeros)
-        return list(zip(*cartela))
+        return gerar_cartela()
 
     def _gerar_id_cartela(self, folha: int, posicao: int) -> str:
         """Gera o ID único no formato EVENTO_F{folha}C{posicao}."""
@@ -135,15 +137,38 @@ class BingoGenerator:
         """Gera todas as cartelas necessárias, garantindo que sejam únicas."""
         print("Gerando cartelas únicas...")
         total_cartelas = self.num_folhas * self.cartelas_por_folha
-        self.cartelas = []
-        
-        while len(self.cartelas) < total_cartelas:
-            nova_cartela = self.gerar_cartela_unica()
-            if nova_cartela not in self.cartelas:
-                self.cartelas.append(nova_cartela)
+        proibidas = set()
+        self.cartelas = self._gerar_cartelas(total_cartelas)
+
+        # Troca as cartelas que já existem em outros eventos, consultando o
+        # banco em lotes; as substitutas também são verificadas
+        while self.unicidade_global:
+            impressoes = [impressao_digital(cartela) for cartela in self.cartelas]
+            repetidas = self.db.obter_impressoes_existentes(impressoes, self.nome_evento)
+            if not repetidas:
+                break
+            print(f"{len(repetidas)} cartelas já existem em outros eventos; gerando substitutas")
+            if self.semente is not None:
+                # Com semente, regera o evento evitando as repetidas: cada
+                # cartela continua dependendo só da semente e da sua posição
+                proibidas |= repetidas
+                self.cartelas = self._gerar_cartelas(total_cartelas, proibidas)
+                continue
+            mantidas = [c for c, i in zip(self.cartelas, impressoes) if i not in repetidas]
+            existentes = {i for i in impressoes if i not in repetidas} | repetidas
+            self.cartelas = mantidas + self._gerar_cartelas(total_cartelas - len(mantidas), existentes)
         
         print(f"Total de cartelas geradas: {len(self.cartelas)}")
 
+    def _gerar_cartelas(self, quantidade: int, existentes=None) -> List[List[Tuple]]:
+        if self.semente is not None:
+            return gerar_cartelas_semeadas(quantidade, self.semente, self.nome_evento, existentes)
+        if self.por_rank:
+            return gerar_cartelas_por_rank(quantidade, existentes)
+        if NUMPY_DISPONIVEL:
+            return gerar_cartelas_unicas_lote(quantidade, existentes)
+        return gerar_cartelas_unicas(quantidade, self.gerar_cartela_unica, existentes)
+
     def desenhar_cartela(self, c: canvas.Canvas, cartela: List[Tuple], 
                         x: float, y: float, indice: int):
         """Desenha uma única cartela na posição especificada."""
@@ -224,10 +249,19 @@ class BingoGenerator:
         return x, y
 
     def criar_pdf(self):
-        """Cria o PDF com todas as cartelas geradas e armazena no banco de dados."""
+        """Cria o PDF com todas as cartelas geradas e armazena no banco de dados.
+
+        As cartelas do evento são gravadas de uma só vez, em uma única
+        transação, depois que o PDF é montado em um arquivo temporário. O PDF
+        só substitui o anterior depois do commit: uma falha no meio do
+        processo nunca deixa um evento pela metade no banco, nem um PDF com
+        cartelas que o banco não conhece.
+        """
         nome_arquivo = f"cartelas_{self.nome_evento.replace(' ', '_')}.pdf"
-        c = canvas.Canvas(nome_arquivo, pagesize=A4)
+        nome_temporario = f"{nome_arquivo}.tmp"
+        c = canvas.Canvas(nome_temporario, pagesize=A4)
         largura, altura = A4
+        registros = []
         
         for folha in range(self.num_folhas):
             # Desenha imagem de fundo
@@ -244,27 +278,39 @@ class BingoGenerator:
                 idx = folha * self.cartelas_por_folha + posicao
                 x, y = self._calcular_posicao_cartela(posicao, largura)
                 
-                # Gera ID único e salva no banco
+                # Gera ID único e registra para gravação no banco
                 id_cartela = self._gerar_id_cartela(folha + 1, posicao + 1)
                 rodada = (posicao % len(self.CORES_RODADAS)) + 1
                 premio = ""
                 
-                self.db.salvar_cartela(
-                    evento=self.nome_evento,
-                    id_cartela=id_cartela,
-                    folha=folha + 1,
-                    posicao=posicao + 1,
-                    numeros=self.cartelas[idx],
-                    rodada=rodada,
-                    premio=premio
-                )
+                registros.append({
+                    'id_cartela': id_cartela,
+                    'folha': folha + 1,
+                    'posicao': posicao + 1,
+                    'numeros': self.cartelas[idx],
+                    'rodada': rodada,
+                    'premio': premio,
+                    'rank': rank_cartela(self.cartelas[idx])
+                })
 
                 self.desenhar_cartela(c, self.cartelas[idx], x, y, posicao)
             
             c.showPage()
         
-        c.save()
+        try:
+            c.save()
+
+            # Substitui as cartelas existentes deste evento
+            removidas, inseridas = self.db.substituir_cartelas_evento(self.nome_evento, registros)
+        except Exception:
+            if os.path.exists(nome_temporario):
+                os.remove(nome_temporario)
+            raise
+
+        os.replace(nome_temporario, nome_arquivo)
         print(f"PDF gerado com sucesso: {nome_arquivo}")
+        print(f"Removidas {removidas} cartelas existentes do evento '{self.nome_evento}'")
+        print(f"Cartelas salvas no banco: {inseridas}")
 
     def executar(self):
         """Executa todo o processo de geração das cartelas."""
@@ -289,12 +335,22 @@ if __name__ == "__main__":
     parser.add_argument('-f', '--folhas', type=int, 
                        default=BingoGenerator.DEFAULT_NUM_FOLHAS,
                        help='Número total de folhas a gerar')
+    parser.add_argument('--sem-unicidade-global', action='store_true',
+                       help='Não verifica repetições com cartelas de outros eventos')
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument('-s', '--semente', type=int, default=None,
+                      help='Semente para gerar (e poder regerar) as cartelas de forma determinística')
+    modo.add_argument('--por-rank', action='store_true',
+                      help='Gera as cartelas sorteando ranks distintos')
     
     args = parser.parse_args()
     
     gerador = BingoGenerator(
         nome_evento=args.nome_evento,
         cartelas_por_folha=args.cartelas_por_folha,
-        num_folhas=args.folhas
+        num_folhas=args.folhas,
+        unicidade_global=not args.sem_unicidade_global,
+        semente=args.semente,
+        por_rank=args.por_rank
     )
     gerador.executar()
\ No newline at end of file
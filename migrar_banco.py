@@ -0,0 +1,37 @@
+"""Migrações do banco de cartelas.
+
+Uso: python migrar_banco.py [arquivo.db]
+"""
+from database import BingoDatabase
+
+
+def migrar(db: BingoDatabase):
+    """Aplica todas as migrações pendentes no banco."""
+    convertidas = db.migrar_numeros_binarios()
+    print(f"Cartelas convertidas para o formato binário: {convertidas}")
+    preenchidas = db.preencher_cartela_numeros()
+    print(f"Cartelas incluídas em cartela_numeros: {preenchidas}")
+    eventos = db.preencher_eventos()
+    print(f"Eventos incluídos na tabela eventos: {eventos}")
+
+    repetidas = db.contar_cartelas_repetidas()
+    if repetidas:
+        print(f"ATENÇÃO: {repetidas} cartelas repetem os números de outra cartela do banco")
+
+    if db.verificar_indice_rodada():
+        print("Carga de rodada usando o índice idx_rodada")
+    else:
+        print("ATENÇÃO: carga de rodada não usa o índice idx_rodada:")
+        for detalhe in db.plano_cartelas_evento():
+            print(f"  {detalhe}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migrações do banco de cartelas')
+    parser.add_argument('arquivo', type=str, nargs='?', default="bingo_cartelas.db",
+                        help='Arquivo do banco SQLite')
+
+    args = parser.parse_args()
+    migrar(BingoDatabase(args.arquivo))
@@ -0,0 +1,338 @@
+"""Motor de verificação de vencedores baseado em máscaras de bits.
+
+Cada cartela é compilada uma única vez em máscaras inteiras, uma por padrão,
+onde o bit ``n - 1`` representa o número ``n``. A célula FREE não entra nas
+máscaras, ficando sempre marcada. Os números sorteados formam uma única
+máscara de 75 bits e cada padrão é verificado com um único AND/comparação.
+"""
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
+
+from padroes import obter_padroes
+
+FREE = "FREE"
+TOTAL_NUMEROS = 75
+
+# Padrões em coordenadas (linha, coluna) da cartela
+CANTOS = ((0, 0), (0, 4), (4, 0), (4, 4))
+LINHAS = tuple(tuple((i, j) for j in range(5)) for i in range(5))
+COLUNAS = tuple(tuple((j, i) for j in range(5)) for i in range(5))
+DIAGONAL_PRINCIPAL = tuple((i, i) for i in range(5))
+DIAGONAL_SECUNDARIA = tuple((i, 4 - i) for i in range(5))
+CARTELA_CHEIA = tuple((i, j) for i in range(5) for j in range(5))
+
+
+def bit_numero(numero) -> int:
+    """Retorna o bit que representa um número (aceita int ou str)."""
+    return 1 << (int(numero) - 1)
+
+
+def mascara_numeros(numeros: Iterable) -> int:
+    """Converte uma coleção de números sorteados (1-75) em uma máscara de bits."""
+    mascara = 0
+    for numero in numeros:
+        numero = int(numero)
+        if not 1 <= numero <= TOTAL_NUMEROS:
+            raise ValueError(f"Número inválido: {numero}")
+        mascara |= bit_numero(numero)
+    return mascara
+
+
+def mascara_celulas(numeros: List[Tuple], celulas: Iterable[Tuple[int, int]]) -> int:
+    """Máscara dos números de uma cartela nas células informadas, ignorando FREE."""
+    mascara = 0
+    for linha, coluna in celulas:
+        numero = numeros[linha][coluna]
+        if numero != FREE:
+            mascara |= bit_numero(numero)
+    return mascara
+
+
+class CartelaCompilada:
+    """Cartela com as máscaras de todos os padrões pré-calculadas."""
+
+    __slots__ = ('id', 'folha', 'posicao', 'numeros',
+                 'cantos', 'linhas', 'colunas', 'diagonais', 'cheia')
+
+    def __init__(self, cartela: Dict[str, Any]):
+        numeros = cartela['numeros']
+        self.id = cartela.get('id')
+        self.folha = cartela['folha']
+        self.posicao = cartela.get('posicao')
+        self.numeros = numeros
+        self.cantos = mascara_celulas(numeros, CANTOS)
+        self.linhas = tuple(mascara_celulas(numeros, c) for c in LINHAS)
+        self.colunas = tuple(mascara_celulas(numeros, c) for c in COLUNAS)
+        self.diagonais = (mascara_celulas(numeros, DIAGONAL_PRINCIPAL),
+                          mascara_celulas(numeros, DIAGONAL_SECUNDARIA))
+        self.cheia = mascara_celulas(numeros, CARTELA_CHEIA)
+
+
+def compilar_cartelas(cartelas: Iterable[Dict[str, Any]]) -> List[CartelaCompilada]:
+    """Compila uma lista de cartelas no formato de /iniciar_rodada."""
+    return [CartelaCompilada(cartela) for cartela in cartelas]
+
+
+def resultados_vazios(status: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Estrutura ``resultados`` de /verificar_vencedor sem nenhum vencedor."""
+    return {
+        'quatro_cantos': [],
+        'linhas': [],
+        'colunas': [],
+        'diagonais': [],
+        'cartela_cheia': [],
+        'status': dict(status) if status else {'quentes': 0, 'mornas': 0}
+    }
+
+
+def avaliar_cartelas(cartelas: List[CartelaCompilada], sorteados: int) -> Dict[str, Any]:
+    """Avalia todas as cartelas contra a máscara de números sorteados.
+
+    Retorna a mesma estrutura ``resultados`` usada por /verificar_vencedor.
+    """
+    resultados = resultados_vazios()
+    quatro_cantos = resultados['quatro_cantos']
+    linhas = resultados['linhas']
+    colunas = resultados['colunas']
+    diagonais = resultados['diagonais']
+    cartela_cheia = resultados['cartela_cheia']
+    status = resultados['status']
+
+    for cartela in cartelas:
+        folha = cartela.folha
+
+        if cartela.cantos & sorteados == cartela.cantos:
+            quatro_cantos.append(folha)
+
+        for i in range(5):
+            mascara = cartela.linhas[i]
+            if mascara & sorteados == mascara:
+                linhas.append({'folha': folha, 'posicao': f'Linha {i+1}'})
+            mascara = cartela.colunas[i]
+            if mascara & sorteados == mascara:
+                colunas.append({'folha': folha, 'posicao': f'Coluna {chr(65+i)}'})
+
+        principal, secundaria = cartela.diagonais
+        if principal & sorteados == principal:
+            diagonais.append({'folha': folha, 'posicao': 'Diagonal Principal'})
+        if secundaria & sorteados == secundaria:
+            diagonais.append({'folha': folha, 'posicao': 'Diagonal Secundária'})
+
+        faltando = (cartela.cheia & ~sorteados).bit_count()
+        if faltando == 0:
+            cartela_cheia.append(folha)
+        elif faltando == 1:
+            status['quentes'] += 1
+        elif faltando == 2:
+            status['mornas'] += 1
+
+    return resultados
+
+
+MOTORES = ('auto', 'python', 'numpy')
+
+
+def avaliar_com_motor(cartelas: List[Dict[str, Any]], sorteados: int,
+                      motor: str = 'auto') -> Dict[str, Any]:
+    """Avalia cartelas no formato de /iniciar_rodada com o motor escolhido.
+
+    ``'auto'`` usa o NumPy quando ele está instalado e a rodada tem pelo menos
+    ``motor_numpy.LIMIAR_NUMPY`` cartelas; caso contrário usa o motor de bits.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor inválido: {motor}")
+
+    from motor_numpy import NUMPY_DISPONIVEL, LIMIAR_NUMPY, avaliar_cartelas_numpy
+
+    if motor == 'numpy' and not NUMPY_DISPONIVEL:
+        print("NumPy não encontrado. Usando motor em Python puro.")
+        motor = 'python'
+    elif motor == 'auto':
+        usar_numpy = NUMPY_DISPONIVEL and len(cartelas) >= LIMIAR_NUMPY
+        motor = 'numpy' if usar_numpy else 'python'
+
+    if motor == 'numpy':
+        return avaliar_cartelas_numpy(cartelas, sorteados)
+    return avaliar_cartelas(compilar_cartelas(cartelas), sorteados)
+
+
+# Agrupamento das categorias para os histogramas de distância
+GRUPOS_DISTANCIA = {
+    'quatro_cantos': 'quatro_cantos',
+    'linhas': 'cinquina',
+    'colunas': 'cinquina',
+    'diagonais': 'cinquina',
+    'cartela_cheia': 'cartela_cheia'
+}
+DISTANCIA_MAXIMA = 3
+
+
+def numeros_mascara(mascara: int) -> List[int]:
+    """Lista os números presentes em uma máscara de bits."""
+    numeros = []
+    while mascara:
+        bit = mascara & -mascara
+        numeros.append(bit.bit_length())
+        mascara ^= bit
+    return numeros
+
+
+def padroes_cartela(cartela: CartelaCompilada,
+                    extras: Sequence[Tuple[str, Tuple[Tuple[int, int], ...]]] = ()
+                    ) -> List[Tuple[str, Optional[str], int]]:
+    """Lista (categoria, posição, máscara) dos padrões na ordem de /verificar_vencedor.
+
+    Os padrões personalizados em ``extras`` (nome, células) entram por último,
+    na categoria ``'padroes'``.
+    """
+    padroes = [('quatro_cantos', None, cartela.cantos)]
+    for i in range(5):
+        padroes.append(('linhas', f'Linha {i+1}', cartela.linhas[i]))
+        padroes.append(('colunas', f'Coluna {chr(65+i)}', cartela.colunas[i]))
+    padroes.append(('diagonais', 'Diagonal Principal', cartela.diagonais[0]))
+    padroes.append(('diagonais', 'Diagonal Secundária', cartela.diagonais[1]))
+    padroes.append(('cartela_cheia', None, cartela.cheia))
+    for nome, celulas in extras:
+        padroes.append(('padroes', nome, mascara_celulas(cartela.numeros, celulas)))
+    return padroes
+
+
+def grupo_distancia(categoria: str, posicao: Optional[str]) -> str:
+    """Grupo do histograma de distâncias; cada padrão personalizado tem o seu."""
+    if categoria == 'padroes':
+        return posicao
+    return GRUPOS_DISTANCIA[categoria]
+
+
+class AvaliadorIncremental:
+    """Detecção incremental de vencedores com índice invertido.
+
+    Cada padrão de cada cartela vira um "slot" com a contagem de números que
+    ainda faltam. O índice invertido leva cada número aos slots que o contêm,
+    então um sorteio só decrementa os slots afetados, em vez de reavaliar
+    todas as cartelas da rodada.
+
+    Para cada cartela e grupo de padrões (quatro cantos, qualquer cinquina,
+    cartela cheia) é mantida a menor distância até completar, alimentando os
+    histogramas de ``status['distancias']`` a cada sorteio.
+
+    Padrões personalizados (ver padroes.py) viram slots como os demais, então
+    não acrescentam nenhum laço por cartela a cada sorteio.
+    """
+
+    def __init__(self, cartelas: List[CartelaCompilada], padroes: Sequence[str] = ()):
+        self.cartelas = cartelas
+        self.padroes = list(padroes)
+        extras = obter_padroes(self.padroes)
+        self.sorteados = 0
+        self.total_sorteios = 0
+        self.indice: List[List[int]] = [[] for _ in range(TOTAL_NUMEROS + 1)]
+        self.slots: List[Tuple[int, str, Optional[str]]] = []
+        self.restantes: List[int] = []
+        self.completos: List[int] = []
+        self.sorteio_slot: Dict[int, int] = {}
+        self.distancia: Dict[Tuple[int, str], int] = {}
+        grupos = list(dict.fromkeys(GRUPOS_DISTANCIA.values())) + self.padroes
+        self.distancias = {grupo: {d: 0 for d in range(1, DISTANCIA_MAXIMA + 1)}
+                           for grupo in grupos}
+
+        for indice_cartela, cartela in enumerate(cartelas):
+            for categoria, posicao, mascara in padroes_cartela(cartela, extras):
+                slot = len(self.slots)
+                numeros = numeros_mascara(mascara)
+                self.slots.append((indice_cartela, categoria, posicao))
+                self.restantes.append(len(numeros))
+                for numero in numeros:
+                    self.indice[numero].append(slot)
+                if not numeros:
+                    self.completos.append(slot)
+                    self.sorteio_slot[slot] = 0
+                chave = (indice_cartela, grupo_distancia(categoria, posicao))
+                self.distancia[chave] = min(self.distancia.get(chave, len(numeros)), len(numeros))
+
+        for (_, grupo), distancia in self.distancia.items():
+            if distancia in self.distancias[grupo]:
+                self.distancias[grupo][distancia] += 1
+
+    @property
+    def status(self) -> Dict[str, Any]:
+        """Bloco ``status`` com cartelas quentes/mornas e os histogramas."""
+        cheia = self.distancias['cartela_cheia']
+        return {
+            'quentes': cheia[1],
+            'mornas': cheia[2],
+            'distancias': {grupo: dict(histograma)
+                           for grupo, histograma in self.distancias.items()}
+        }
+
+    def registrar(self, numero) -> List[int]:
+        """Registra um número e retorna os slots completados por ele."""
+        bit = bit_numero(numero)
+        if self.sorteados & bit:
+            return []
+        self.sorteados |= bit
+        self.total_sorteios += 1
+
+        novos = []
+        restantes = self.restantes
+        distancia = self.distancia
+        for slot in self.indice[int(numero)]:
+            faltando = restantes[slot] - 1
+            restantes[slot] = faltando
+            if faltando == 0:
+                novos.append(slot)
+
+            indice_cartela, categoria, posicao = self.slots[slot]
+            chave = (indice_cartela, grupo_distancia(categoria, posicao))
+            anterior = distancia[chave]
+            if faltando < anterior:
+                distancia[chave] = faltando
+                histograma = self.distancias[chave[1]]
+                if anterior in histograma:
+                    histograma[anterior] -= 1
+                if faltando in histograma:
+                    histograma[faltando] += 1
+
+        if novos:
+            # Sem ordenar aqui: o custo do sorteio depende só das cartelas com o
+            # número, não de quantos padrões já foram completados
+            self.completos.extend(novos)
+            for slot in novos:
+                self.sorteio_slot[slot] = self.total_sorteios
+        return novos
+
+    def _resultados_vazios(self) -> Dict[str, Any]:
+        resultados = resultados_vazios(self.status)
+        if self.padroes:
+            resultados['padroes'] = []
+        return resultados
+
+    def entrada(self, slot: int):
+        """Entrada de ``resultados`` correspondente a um slot."""
+        indice_cartela, _, posicao = self.slots[slot]
+        folha = self.cartelas[indice_cartela].folha
+        if posicao is None:
+            return folha
+        return {'folha': folha, 'posicao': posicao}
+
+    def resultados(self) -> Dict[str, Any]:
+        """Monta a estrutura ``resultados`` com todos os padrões completos."""
+        resultados = self._resultados_vazios()
+        for slot in sorted(self.completos):
+            resultados[self.slots[slot][1]].append(self.entrada(slot))
+        return resultados
+
+    def resultados_novos(self, slots: List[int]) -> Dict[str, Any]:
+        """Monta ``resultados`` apenas com os slots informados.
+
+        Cada entrada vira um dicionário com ``folha`` e ``sorteio``, o número
+        de ordem do sorteio em que o padrão foi completado.
+        """
+        resultados = self._resultados_vazios()
+        resultados['sorteio'] = self.total_sorteios
+        for slot in sorted(slots):
+            entrada = self.entrada(slot)
+            if not isinstance(entrada, dict):
+                entrada = {'folha': entrada}
+            entrada['sorteio'] = self.sorteio_slot[slot]
+            resultados[self.slots[slot][1]].append(entrada)
+        return resultados
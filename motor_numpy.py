@@ -0,0 +1,91 @@
+"""Avaliação vetorizada de cartelas com NumPy.
+
+As cartelas ficam em um array (N, 5, 5) uint8, com FREE representado por 0,
+e os números sorteados em uma tabela booleana de 76 posições (a posição 0,
+usada pelo FREE, está sempre marcada). Linhas, colunas, diagonais, cantos e
+cartela cheia são calculados para todas as cartelas com poucas operações.
+
+O NumPy é opcional: sem ele, ``NUMPY_DISPONIVEL`` é False e o motor em
+Python puro de ``motor_bingo`` continua sendo usado.
+"""
+from typing import List, Dict, Any
+
+from motor_bingo import FREE, TOTAL_NUMEROS, numeros_mascara
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY_DISPONIVEL = np is not None
+
+# Quantidade de cartelas a partir da qual o modo 'auto' usa o NumPy. Medido com
+# benchmark_motor.py: incluindo a montagem das estruturas (caso de
+# /verificar_vencedor) o NumPy já vence com poucas dezenas de cartelas;
+# só a avaliação, com estruturas prontas, cruza por volta de 100 cartelas.
+LIMIAR_NUMPY = 25
+
+_DIAGONAL = [0, 1, 2, 3, 4]
+_DIAGONAL_INVERTIDA = [4, 3, 2, 1, 0]
+_CANTOS_LINHAS = [0, 0, 4, 4]
+_CANTOS_COLUNAS = [0, 4, 0, 4]
+
+
+class MatrizCartelas:
+    """Cartelas de uma rodada empacotadas em um array (N, 5, 5).
+
+    Recebe as cartelas no formato de /iniciar_rodada, sem passar pela
+    compilação em máscaras do motor de bits.
+    """
+
+    def __init__(self, cartelas: List[Dict[str, Any]]):
+        if np is None:
+            raise RuntimeError("NumPy não está instalado")
+        self.folhas = [cartela['folha'] for cartela in cartelas]
+        self.numeros = np.array(
+            [0 if n == FREE else int(n)
+             for cartela in cartelas for linha in cartela['numeros'] for n in linha],
+            dtype=np.uint8
+        ).reshape(-1, 5, 5)
+
+    def tabela_sorteados(self, sorteados: int):
+        """Tabela booleana de 76 posições a partir da máscara de sorteados."""
+        tabela = np.zeros(TOTAL_NUMEROS + 1, dtype=bool)
+        tabela[0] = True
+        tabela[numeros_mascara(sorteados)] = True
+        return tabela
+
+    def avaliar(self, sorteados: int) -> Dict[str, Any]:
+        """Avalia todas as cartelas, retornando a estrutura ``resultados``."""
+        marcados = self.tabela_sorteados(sorteados)[self.numeros]
+
+        cantos = marcados[:, _CANTOS_LINHAS, _CANTOS_COLUNAS].all(axis=1)
+        linhas = marcados.all(axis=2)
+        colunas = marcados.all(axis=1)
+        principal = marcados[:, _DIAGONAL, _DIAGONAL].all(axis=1)
+        secundaria = marcados[:, _DIAGONAL, _DIAGONAL_INVERTIDA].all(axis=1)
+        faltando = 25 - marcados.sum(axis=(1, 2))
+
+        folhas = self.folhas
+        diagonais = np.stack([principal, secundaria], axis=1)
+        nomes_diagonais = ('Diagonal Principal', 'Diagonal Secundária')
+
+        return {
+            'quatro_cantos': [folhas[i] for i in np.flatnonzero(cantos).tolist()],
+            'linhas': [{'folha': folhas[c], 'posicao': f'Linha {i+1}'}
+                       for c, i in zip(*(a.tolist() for a in np.nonzero(linhas)))],
+            'colunas': [{'folha': folhas[c], 'posicao': f'Coluna {chr(65+i)}'}
+                        for c, i in zip(*(a.tolist() for a in np.nonzero(colunas)))],
+            'diagonais': [{'folha': folhas[c], 'posicao': nomes_diagonais[i]}
+                          for c, i in zip(*(a.tolist() for a in np.nonzero(diagonais)))],
+            'cartela_cheia': [folhas[i] for i in np.flatnonzero(faltando == 0).tolist()],
+            'status': {
+                'quentes': int((faltando == 1).sum()),
+                'mornas': int((faltando == 2).sum())
+            }
+        }
+
+
+def avaliar_cartelas_numpy(cartelas: List[Dict[str, Any]], sorteados: int) -> Dict[str, Any]:
+    """Equivalente vetorizado de ``motor_bingo.avaliar_cartelas``."""
+    return MatrizCartelas(cartelas).avaliar(sorteados)
@@ -0,0 +1,86 @@
+"""Biblioteca de padrões de vitória personalizados.
+
+Cada padrão é declarado uma única vez como um modelo 5x5, onde ``X`` marca as
+células que precisam ser sorteadas e ``.`` as demais. Os modelos são
+compilados em tuplas de células (linha, coluna) no registro, e o motor os
+transforma em máscaras de números por cartela ao iniciar a rodada.
+"""
+from typing import Dict, List, Tuple
+
+PADROES: Dict[str, Tuple[Tuple[int, int], ...]] = {}
+
+
+def compilar_modelo(modelo: List[str]) -> Tuple[Tuple[int, int], ...]:
+    """Converte um modelo 5x5 em uma tupla de células (linha, coluna)."""
+    if len(modelo) != 5 or any(len(linha) != 5 for linha in modelo):
+        raise ValueError("O modelo deve ter 5 linhas de 5 caracteres")
+    if any(c not in 'X.' for linha in modelo for c in linha):
+        raise ValueError("O modelo só aceita 'X' e '.'")
+
+    celulas = tuple((i, j) for i, linha in enumerate(modelo)
+                    for j, c in enumerate(linha) if c == 'X')
+    if not celulas:
+        raise ValueError("O modelo deve marcar pelo menos uma célula")
+    return celulas
+
+
+def registrar_padrao(nome: str, modelo: List[str]):
+    """Registra (ou substitui) um padrão personalizado."""
+    PADROES[nome] = compilar_modelo(modelo)
+
+
+def obter_padroes(nomes: List[str]) -> List[Tuple[str, Tuple[Tuple[int, int], ...]]]:
+    """Retorna (nome, células) dos padrões pedidos, na ordem informada."""
+    desconhecidos = [nome for nome in nomes if nome not in PADROES]
+    if desconhecidos:
+        raise ValueError(f"Padrões desconhecidos: {', '.join(desconhecidos)}")
+    return [(nome, PADROES[nome]) for nome in nomes]
+
+
+registrar_padrao('X', [
+    "X...X",
+    ".X.X.",
+    "..X..",
+    ".X.X.",
+    "X...X",
+])
+
+registrar_padrao('T', [
+    "XXXXX",
+    "..X..",
+    "..X..",
+    "..X..",
+    "..X..",
+])
+
+registrar_padrao('L', [
+    "X....",
+    "X....",
+    "X....",
+    "X....",
+    "XXXXX",
+])
+
+registrar_padrao('Moldura', [
+    "XXXXX",
+    "X...X",
+    "X...X",
+    "X...X",
+    "XXXXX",
+])
+
+registrar_padrao('Selo', [
+    "...XX",
+    "...XX",
+    ".....",
+    ".....",
+    ".....",
+])
+
+registrar_padrao('Pequeno Losango', [
+    ".....",
+    "..X..",
+    ".XXX.",
+    "..X..",
+    ".....",
+])
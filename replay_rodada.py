@@ -0,0 +1,76 @@
+"""Replay de uma sequência de sorteios para auditoria e disputas.
+
+Para uma sequência registrada de números, calcula em que sorteio cada cartela
+completou cada padrão. As cartelas vêm do BingoDatabase e a sequência passa
+uma única vez pelo AvaliadorIncremental, sem reavaliar cada prefixo.
+"""
+from typing import List, Dict, Any, Iterable, Optional, Sequence
+
+from database import BingoDatabase, formatar_cartela
+from motor_bingo import compilar_cartelas, AvaliadorIncremental, TOTAL_NUMEROS
+
+NOMES_CATEGORIAS = {
+    'quatro_cantos': 'Quatro Cantos',
+    'cartela_cheia': 'Cartela Cheia'
+}
+
+
+def replay_cartelas(cartelas: Iterable[Dict[str, Any]], numeros: Iterable,
+                    padroes: Sequence[str] = ()) -> List[Dict[str, Any]]:
+    """Retorna um registro por (cartela, padrão) completado, na ordem dos sorteios.
+
+    Cada registro traz ``id``, ``folha``, ``posicao`` (da cartela na folha),
+    ``categoria``, ``padrao``, ``sorteio`` (ordem do sorteio, a partir de 1)
+    e ``numero`` (o número que completou o padrão). Números repetidos na
+    sequência são ignorados, como em uma rodada real.
+    """
+    avaliador = AvaliadorIncremental(compilar_cartelas(cartelas), padroes)
+    registros = []
+
+    for numero in numeros:
+        numero = int(numero)
+        if not 1 <= numero <= TOTAL_NUMEROS:
+            raise ValueError(f"Número inválido: {numero}")
+
+        for slot in avaliador.registrar(numero):
+            indice_cartela, categoria, posicao = avaliador.slots[slot]
+            cartela = avaliador.cartelas[indice_cartela]
+            registros.append({
+                'id': cartela.id,
+                'folha': cartela.folha,
+                'posicao': cartela.posicao,
+                'categoria': categoria,
+                'padrao': posicao or NOMES_CATEGORIAS[categoria],
+                'sorteio': avaliador.sorteio_slot[slot],
+                'numero': numero
+            })
+
+    return registros
+
+
+def replay_rodada(evento: str, rodada: int, numeros: Iterable,
+                  padroes: Sequence[str] = (), db: Optional[BingoDatabase] = None) -> List[Dict[str, Any]]:
+    """Executa o replay com as cartelas de (evento, rodada) salvas no banco."""
+    db = db or BingoDatabase()
+    cartelas = (formatar_cartela(c) for c in db.iterar_cartelas(evento, rodada))
+    return replay_cartelas(cartelas, numeros, padroes)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Replay de sorteios de uma rodada')
+    parser.add_argument('evento', type=str, help='Nome do evento de bingo')
+    parser.add_argument('rodada', type=int, help='Número da rodada')
+    parser.add_argument('numeros', type=int, nargs='+',
+                        help='Números sorteados, na ordem do sorteio')
+    parser.add_argument('-p', '--padroes', type=str, default='',
+                        help='Padrões personalizados separados por vírgula')
+
+    args = parser.parse_args()
+    padroes = [p.strip() for p in args.padroes.split(',') if p.strip()]
+
+    registros = replay_rodada(args.evento, args.rodada, args.numeros, padroes)
+    print("sorteio;numero;id;folha;posicao;padrao")
+    for r in registros:
+        print(f"{r['sorteio']};{r['numero']};{r['id']};{r['folha']};{r['posicao']};{r['padrao']}")
@@ -0,0 +1,193 @@
+"""Sessões de rodada mantidas no servidor.
+
+Uma sessão guarda as cartelas compiladas da rodada e os números já sorteados,
+de modo que o navegador só precisa enviar o número recém-sorteado.
+
+Com um ``DiarioRodadas`` configurado, início, sorteios, vencedores e fim de
+cada rodada são registrados no banco, e uma rodada interrompida pode ser
+reconstruída a partir do diário com ``GerenciadorSessoes.restaurar``.
+
+Telas de acompanhamento (locutor, painel, caixa) assinam a sessão e recebem
+cada sorteio como um evento Server-Sent Events já serializado; a avaliação
+acontece uma única vez, independente do número de telas.
+"""
+import json
+import queue
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Iterable, Optional, Sequence
+
+from motor_bingo import compilar_cartelas, AvaliadorIncremental, bit_numero, TOTAL_NUMEROS
+from diario_rodadas import DiarioRodadas
+
+MODOS_RESPOSTA = ('completo', 'delta')
+
+# Sessões sem sorteios nem assinantes por este tempo são descartadas da memória;
+# como não são finalizadas no diário, podem ser restauradas depois
+SESSAO_OCIOSA_SEGUNDOS = 6 * 60 * 60
+
+
+class SessaoRodada:
+    """Estado de uma rodada em andamento."""
+
+    def __init__(self, id_rodada: str, evento: str, rodada: int,
+                 cartelas: Iterable[Dict[str, Any]], padroes: Sequence[str] = (),
+                 diario: Optional[DiarioRodadas] = None):
+        self.id_rodada = id_rodada
+        self.evento = evento
+        self.rodada = rodada
+        self.padroes = list(padroes)
+        self.diario = diario
+        self.cartelas = compilar_cartelas(cartelas)
+        self.avaliador = AvaliadorIncremental(self.cartelas, padroes)
+        self.numeros_sorteados: List[int] = []
+        self.assinantes: List[queue.Queue] = []
+        self.lock = threading.Lock()
+        self.ultimo_acesso = time.monotonic()
+
+    @property
+    def total_cartelas(self) -> int:
+        return len(self.cartelas)
+
+    def registrar_numero(self, numero, modo: str = 'completo') -> Dict[str, Any]:
+        """Registra um número sorteado e retorna os resultados da rodada.
+
+        No modo ``'completo'`` retorna todos os vencedores desde o início da
+        rodada; no modo ``'delta'`` apenas os padrões completados por este
+        sorteio. Números repetidos são ignorados, tornando a chamada idempotente.
+        """
+        if modo not in MODOS_RESPOSTA:
+            raise ValueError(f"Modo inválido: {modo}")
+        numero = int(numero)
+        if not 1 <= numero <= TOTAL_NUMEROS:
+            raise ValueError(f"Número inválido: {numero}")
+
+        with self.lock:
+            self.ultimo_acesso = time.monotonic()
+            novos = []
+            delta = None
+            if not self.avaliador.sorteados & bit_numero(numero):
+                self.numeros_sorteados.append(numero)
+                novos = self.avaliador.registrar(numero)
+                if self.diario is not None:
+                    self._registrar_no_diario(numero, novos)
+                if self.assinantes:
+                    delta = self.avaliador.resultados_novos(novos)
+                    self._publicar('sorteio', dict(delta, numero=numero))
+            if modo == 'delta':
+                return delta or self.avaliador.resultados_novos(novos)
+            return self.avaliador.resultados()
+
+    def _registrar_no_diario(self, numero: int, novos: List[int]):
+        vencedores = []
+        for slot in novos:
+            indice_cartela, categoria, posicao = self.avaliador.slots[slot]
+            cartela = self.cartelas[indice_cartela]
+            vencedores.append((cartela.id, cartela.folha, categoria, posicao))
+        self.diario.registrar_sorteio(self.id_rodada, self.avaliador.total_sorteios,
+                                      numero, vencedores)
+
+    def reaplicar(self, numeros: Sequence[int]):
+        """Reaplica números já registrados no diário, sem registrá-los de novo."""
+        with self.lock:
+            for numero in numeros:
+                if not self.avaliador.sorteados & bit_numero(numero):
+                    self.numeros_sorteados.append(numero)
+                    self.avaliador.registrar(numero)
+
+    def _publicar(self, evento: str, dados: Optional[Dict[str, Any]]):
+        """Envia uma mensagem SSE a todos os assinantes (None encerra o fluxo)."""
+        mensagem = None
+        if dados is not None:
+            mensagem = formatar_sse(evento, dados)
+        for fila in self.assinantes:
+            fila.put(mensagem)
+
+    def assinar(self) -> queue.Queue:
+        """Cria a fila de um novo assinante, já com o estado atual da rodada."""
+        fila = queue.Queue()
+        with self.lock:
+            self.ultimo_acesso = time.monotonic()
+            estado = self.avaliador.resultados()
+            estado['numeros_sorteados'] = list(self.numeros_sorteados)
+            fila.put(formatar_sse('estado', estado))
+            self.assinantes.append(fila)
+        return fila
+
+    def cancelar_assinatura(self, fila: queue.Queue):
+        with self.lock:
+            if fila in self.assinantes:
+                self.assinantes.remove(fila)
+
+    def encerrar(self):
+        """Avisa os assinantes que a rodada terminou e fecha os fluxos."""
+        with self.lock:
+            self._publicar('fim', {'id_rodada': self.id_rodada})
+            self._publicar('fim', None)
+            self.assinantes = []
+
+
+def formatar_sse(evento: str, dados: Dict[str, Any]) -> str:
+    """Serializa uma mensagem no formato text/event-stream."""
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+class GerenciadorSessoes:
+    """Registro thread-safe das sessões de rodada ativas."""
+
+    def __init__(self, diario: Optional[DiarioRodadas] = None):
+        self._sessoes: Dict[str, SessaoRodada] = {}
+        self._lock = threading.Lock()
+        self.diario = diario
+
+    def criar(self, evento: str, rodada: int, cartelas: Iterable[Dict[str, Any]],
+              padroes: Sequence[str] = ()) -> SessaoRodada:
+        self.remover_ociosas()
+        sessao = SessaoRodada(uuid.uuid4().hex, evento, rodada, cartelas, padroes, self.diario)
+        with self._lock:
+            self._sessoes[sessao.id_rodada] = sessao
+        if self.diario is not None:
+            self.diario.iniciar_rodada(sessao.id_rodada, evento, rodada, sessao.padroes)
+        return sessao
+
+    def restaurar(self, id_rodada: str, evento: str, rodada: int,
+                  cartelas: Iterable[Dict[str, Any]], padroes: Sequence[str],
+                  numeros_sorteados: Sequence[int]) -> SessaoRodada:
+        """Reconstrói uma rodada do diário, reaplicando os sorteios em uma passada."""
+        self.remover_ociosas()
+        sessao = SessaoRodada(id_rodada, evento, rodada, cartelas, padroes, self.diario)
+        sessao.reaplicar(numeros_sorteados)
+        with self._lock:
+            # Outra requisição pode ter restaurado a mesma rodada enquanto esta compilava
+            sessao = self._sessoes.setdefault(id_rodada, sessao)
+        return sessao
+
+    def obter(self, id_rodada: str) -> Optional[SessaoRodada]:
+        with self._lock:
+            return self._sessoes.get(id_rodada)
+
+    def remover(self, id_rodada: str) -> Optional[SessaoRodada]:
+        with self._lock:
+            sessao = self._sessoes.pop(id_rodada, None)
+        if sessao is not None:
+            sessao.encerrar()
+            if self.diario is not None:
+                self.diario.finalizar_rodada(id_rodada)
+        return sessao
+
+    def remover_ociosas(self, limite: float = SESSAO_OCIOSA_SEGUNDOS) -> int:
+        """Descarta da memória as sessões ociosas há mais de ``limite`` segundos.
+
+        Rodadas abandonadas sem finalizar não ficam presas na memória; como o
+        diário não é finalizado, ``restaurar`` ainda consegue reconstruí-las.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            ociosas = [id_rodada for id_rodada, sessao in self._sessoes.items()
+                       if not sessao.assinantes and agora - sessao.ultimo_acesso > limite]
+            for id_rodada in ociosas:
+                del self._sessoes[id_rodada]
+        if ociosas:
+            print(f"{len(ociosas)} sessões ociosas descartadas da memória")
+        return len(ociosas)
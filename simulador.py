@@ -0,0 +1,196 @@
+"""Simulador Monte Carlo de sorteios até o primeiro vencedor.
+
+Dadas as cartelas de uma rodada no banco, estima quantos números precisam ser
+sorteados até sair o primeiro quatro cantos, a primeira cinquina (linha,
+coluna ou diagonal) e a primeira cartela cheia. Ajuda a definir os limites
+de prêmios (máx 4 cantos, cinquinas e cartela cheia) antes do evento.
+
+Cada simulação sorteia uma ordem aleatória dos 75 números; um padrão é
+completado no sorteio de maior posição entre seus números, e o primeiro
+vencedor é o menor desses valores entre todas as cartelas. Os lotes rodam em
+um pool de processos, com NumPy quando disponível, e cada processo devolve
+apenas histogramas de 75 posições.
+"""
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import List, Dict, Any, Optional, Tuple
+
+from database import BingoDatabase, formatar_cartela
+from motor_bingo import (FREE, TOTAL_NUMEROS, CANTOS, LINHAS, COLUNAS,
+                         DIAGONAL_PRINCIPAL, DIAGONAL_SECUNDARIA, CARTELA_CHEIA)
+from motor_numpy import NUMPY_DISPONIVEL
+
+if NUMPY_DISPONIVEL:
+    import numpy as np
+
+CATEGORIAS = ('quatro_cantos', 'cinquina', 'cartela_cheia')
+PERCENTIS = (5, 25, 50, 75, 95, 99)
+
+# Quantidade de células (simulações x cartelas x 25) por bloco no NumPy
+CELULAS_POR_BLOCO = 4_000_000
+
+
+def _grupos_celulas() -> Dict[str, List[Tuple[Tuple[int, int], ...]]]:
+    return {
+        'quatro_cantos': [CANTOS],
+        'cinquina': list(LINHAS) + list(COLUNAS) + [DIAGONAL_PRINCIPAL, DIAGONAL_SECUNDARIA],
+        'cartela_cheia': [CARTELA_CHEIA]
+    }
+
+
+def _simular_python(numeros: List[List[List[int]]], quantidade: int,
+                    rng: random.Random) -> Dict[str, List[int]]:
+    """Simulação em Python puro (usada quando o NumPy não está instalado)."""
+    grupos = {}
+    for categoria, padroes in _grupos_celulas().items():
+        grupos[categoria] = [
+            tuple(n for n in (cartela[i][j] for i, j in celulas) if n)
+            for cartela in numeros for celulas in padroes
+        ]
+
+    histogramas = {categoria: [0] * (TOTAL_NUMEROS + 1) for categoria in CATEGORIAS}
+    ordem = list(range(1, TOTAL_NUMEROS + 1))
+    posicao = [0] * (TOTAL_NUMEROS + 1)
+
+    for _ in range(quantidade):
+        rng.shuffle(ordem)
+        for i, numero in enumerate(ordem, 1):
+            posicao[numero] = i
+        for categoria, padroes in grupos.items():
+            primeiro = min(max(posicao[n] for n in padrao) for padrao in padroes)
+            histogramas[categoria][primeiro] += 1
+
+    return histogramas
+
+
+def _simular_numpy(numeros: List[List[List[int]]], quantidade: int,
+                   semente: int) -> Dict[str, List[int]]:
+    """Simulação vetorizada: blocos de ordens aleatórias avaliados de uma vez."""
+    rng = np.random.default_rng(semente)
+    cartelas = np.array(numeros, dtype=np.uint8)
+    bloco = max(1, CELULAS_POR_BLOCO // (len(cartelas) * 25))
+    diagonal = np.arange(5)
+    histogramas = {categoria: np.zeros(TOTAL_NUMEROS + 1, dtype=np.int64)
+                   for categoria in CATEGORIAS}
+
+    restantes = quantidade
+    while restantes > 0:
+        s = min(bloco, restantes)
+        restantes -= s
+
+        # posicao[k, n] = ordem em que o número n sai na simulação k (FREE = 0)
+        ordem = rng.permuted(np.tile(np.arange(1, TOTAL_NUMEROS + 1, dtype=np.uint8), (s, 1)), axis=1)
+        posicao = np.zeros((s, TOTAL_NUMEROS + 1), dtype=np.uint8)
+        np.put_along_axis(posicao, ordem.astype(np.intp),
+                          np.arange(1, TOTAL_NUMEROS + 1, dtype=np.uint8)[None, :], axis=1)
+
+        p = posicao[np.arange(s)[:, None, None, None], cartelas[None, :, :, :]]
+
+        cantos = p[:, :, [0, 0, 4, 4], [0, 4, 0, 4]].max(axis=2).min(axis=1)
+        cinquina = np.minimum.reduce([
+            p.max(axis=3).min(axis=(1, 2)),
+            p.max(axis=2).min(axis=(1, 2)),
+            p[:, :, diagonal, diagonal].max(axis=2).min(axis=1),
+            p[:, :, diagonal, diagonal[::-1]].max(axis=2).min(axis=1)
+        ])
+        cheia = p.reshape(s, len(cartelas), 25).max(axis=2).min(axis=1)
+
+        for categoria, valores in zip(CATEGORIAS, (cantos, cinquina, cheia)):
+            histogramas[categoria] += np.bincount(valores, minlength=TOTAL_NUMEROS + 1)
+
+    return {categoria: h.tolist() for categoria, h in histogramas.items()}
+
+
+def _simular_lote(args) -> Dict[str, List[int]]:
+    numeros, quantidade, semente, usar_numpy = args
+    if usar_numpy:
+        return _simular_numpy(numeros, quantidade, semente)
+    return _simular_python(numeros, quantidade, random.Random(semente))
+
+
+def percentil(histograma: List[int], p: float) -> int:
+    """Menor número de sorteios que cobre ``p``% das simulações."""
+    total = sum(histograma)
+    limite = total * p / 100
+    acumulado = 0
+    for sorteios, contagem in enumerate(histograma):
+        acumulado += contagem
+        if contagem and acumulado >= limite:
+            return sorteios
+    return len(histograma) - 1
+
+
+def simular(cartelas: List[Dict[str, Any]], simulacoes: int, processos: Optional[int] = None,
+            semente: Optional[int] = None, usar_numpy: bool = NUMPY_DISPONIVEL) -> Dict[str, Any]:
+    """Executa as simulações no pool de processos e resume os resultados."""
+    if not cartelas:
+        raise ValueError("Nenhuma cartela para simular")
+
+    numeros = [[[0 if n == FREE else int(n) for n in linha] for linha in c['numeros']]
+               for c in cartelas]
+    processos = processos or os.cpu_count() or 1
+    semente = random.randrange(2**32) if semente is None else semente
+
+    # Lotes menores que o total por processo equilibram a carga
+    lotes = max(1, min(simulacoes, processos * 4))
+    tamanhos = [simulacoes // lotes + (1 if i < simulacoes % lotes else 0) for i in range(lotes)]
+    tarefas = [(numeros, t, semente + i, usar_numpy) for i, t in enumerate(tamanhos)]
+
+    inicio = time.perf_counter()
+    if processos == 1:
+        parciais = [_simular_lote(t) for t in tarefas]
+    else:
+        with Pool(processos) as pool:
+            parciais = pool.map(_simular_lote, tarefas)
+    duracao = time.perf_counter() - inicio
+
+    resumo = {
+        'cartelas': len(cartelas),
+        'simulacoes': simulacoes,
+        'processos': processos,
+        'motor': 'numpy' if usar_numpy else 'python',
+        'segundos': duracao,
+        'rodadas_por_segundo': simulacoes / duracao if duracao else float('inf')
+    }
+    for categoria in CATEGORIAS:
+        histograma = [sum(p[categoria][i] for p in parciais) for i in range(TOTAL_NUMEROS + 1)]
+        resumo[categoria] = {
+            'media': sum(i * c for i, c in enumerate(histograma)) / simulacoes,
+            'percentis': {p: percentil(histograma, p) for p in PERCENTIS},
+            'histograma': histograma
+        }
+    return resumo
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Simulador Monte Carlo de sorteios')
+    parser.add_argument('evento', type=str, help='Nome do evento de bingo')
+    parser.add_argument('rodada', type=int, help='Número da rodada')
+    parser.add_argument('-n', '--simulacoes', type=int, default=1_000_000,
+                        help='Quantidade de rodadas simuladas')
+    parser.add_argument('-p', '--processos', type=int, default=None,
+                        help='Processos no pool (padrão: número de CPUs)')
+    parser.add_argument('-s', '--semente', type=int, default=None,
+                        help='Semente para reproduzir a simulação')
+    parser.add_argument('--python', action='store_true',
+                        help='Força o motor em Python puro')
+
+    args = parser.parse_args()
+
+    db = BingoDatabase()
+    cartelas = [formatar_cartela(c) for c in db.obter_cartelas_rodada(args.evento, args.rodada)]
+    resumo = simular(cartelas, args.simulacoes, args.processos, args.semente,
+                     usar_numpy=NUMPY_DISPONIVEL and not args.python)
+
+    print(f"{resumo['cartelas']} cartelas, {resumo['simulacoes']} simulações, "
+          f"{resumo['processos']} processos, motor {resumo['motor']}")
+    print(f"Tempo: {resumo['segundos']:.2f}s ({resumo['rodadas_por_segundo']:,.0f} rodadas/s)")
+    print(f"{'padrão':<15} {'média':>6} " + " ".join(f"{'p' + str(p):>4}" for p in PERCENTIS))
+    for categoria in CATEGORIAS:
+        dados = resumo[categoria]
+        print(f"{categoria:<15} {dados['media']:>6.1f} " +
+              " ".join(f"{dados['percentis'][p]:>4}" for p in PERCENTIS))